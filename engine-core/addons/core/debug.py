@@ -1,7 +1,7 @@
 import asyncio
 import re
 import threading
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from mitmproxy import http, ctx
 from .utils import setup_logging
 
@@ -14,6 +14,11 @@ class DebugManager:
         self.breakpoints: List[Dict[str, Any]] = []
         self.intercepted_flows: Dict[str, Dict[str, Any]] = {} # flow_id -> {event: asyncio.Event, flow: HTTPFlow, phase: str}
         self.lock = threading.Lock()
+        # Enabled rules with precompiled URL matchers as one immutable
+        # (version, active phases, (rule, matcher, on_request, on_response)...)
+        # snapshot, rebuilt on every edit so should_intercept reads it lock-free.
+        self._rules_version = 0
+        self._matcher_snapshot: Tuple[int, frozenset, Tuple[Tuple[Dict[str, Any], Callable[[str], bool], bool, bool], ...]] = (0, frozenset(), ())
 
     def add_breakpoint(self, rule: Dict[str, Any]):
         """Add a breakpoint rule. Can be called with:
@@ -51,6 +56,7 @@ class DebugManager:
             if not exists:
                 self.breakpoints.append(rule)
                 self.logger.info(f"Added breakpoint: {pattern} (matchType: {rule.get('matchType')})")
+            self._rebuild_matchers_locked()
 
     def remove_breakpoint(self, id_or_pattern: str) -> None:
         """Remove breakpoint by ID or pattern (for backwards compatibility)"""
@@ -59,22 +65,47 @@ class DebugManager:
                 bp for bp in self.breakpoints
                 if bp.get("id") != id_or_pattern and bp.get("pattern") != id_or_pattern
             ]
+            self._rebuild_matchers_locked()
 
-    def _match_url(self, url: str, rule: Dict[str, Any]) -> bool:
-        """Check if URL matches a breakpoint rule based on matchType"""
+    def clear_breakpoints(self) -> None:
+        """Remove all breakpoint rules."""
+        with self.lock:
+            self.breakpoints = []
+            self._rebuild_matchers_locked()
+
+    def _rebuild_matchers_locked(self) -> None:
+        matchers = []
+        phases = set()
+        for rule in self.breakpoints:
+            if not rule.get("enabled", True):
+                continue
+            on_request = bool(rule.get("breakOnRequest", True))
+            on_response = bool(rule.get("breakOnResponse", False))
+            if on_request:
+                phases.add("request")
+            if on_response:
+                phases.add("response")
+            if on_request or on_response:
+                matchers.append((rule, self._compile_matcher(rule), on_request, on_response))
+        self._rules_version += 1
+        self._matcher_snapshot = (self._rules_version, frozenset(phases), tuple(matchers))
+
+    @staticmethod
+    def _compile_matcher(rule: Dict[str, Any]) -> Callable[[str], bool]:
+        """Build a URL predicate for this rule's matchType (exact, regex or contains)."""
         pattern = rule.get("pattern", "")
         match_type = rule.get("matchType", "contains")
 
-        try:
-            if match_type == "exact":
-                return url == pattern
-            elif match_type == "regex":
-                return bool(re.search(pattern, url, re.IGNORECASE))
-            else:  # contains (default)
-                return pattern in url
-        except re.error:
-            # Invalid regex, fall back to contains
-            return pattern in url
+        if match_type == "exact":
+            return pattern.__eq__
+        if match_type == "regex":
+            try:
+                search = re.compile(pattern, re.IGNORECASE).search
+                return lambda url: search(url) is not None
+            except re.error:
+                # Invalid regex, fall back to contains
+                pass
+        return lambda url: pattern in url
 
     def _record_breakpoint_hit(self, flow: http.HTTPFlow, phase: str, rule: Optional[Dict[str, Any]] = None) -> None:
         """Record breakpoint hit in flow metadata for display in traffic list"""
@@ -110,25 +141,34 @@ class DebugManager:
         if flow.request.path.startswith("/_relay"):
             return None
 
-        url = flow.request.pretty_url
-
-        with self.lock:
-            for rule in self.breakpoints:
-                if not rule.get("enabled", True):
-                    continue
-
-                # Check phase
-                if phase == "request" and not rule.get("breakOnRequest", True):
-                    continue
-                if phase == "response" and not rule.get("breakOnResponse", False):
-                    continue
-
-                # Check URL match
-                if self._match_url(url, rule):
-                    self.logger.info(f"Breakpoint matched: {rule.get('pattern')} for {url} ({phase})")
-                    return rule
+        version, phases, matchers = self._matcher_snapshot
+        if phase not in phases:
+            return None
 
-        return None
+        # Both phases are resolved in one pass over the rules and cached on
+        # the flow, so the response check is a lookup unless the rules or
+        # the URL changed in between.
+        url = flow.request.pretty_url
+        cached = flow.metadata.get("_relaycraft_bp_match")
+        if cached is None or cached[0] != version or cached[1] != url:
+            request_rule = response_rule = None
+            for rule, matches, on_request, on_response in matchers:
+                want_request = on_request and request_rule is None
+                want_response = on_response and response_rule is None
+                if (want_request or want_response) and matches(url):
+                    if want_request:
+                        request_rule = rule
+                    if want_response:
+                        response_rule = rule
+                    if request_rule is not None and response_rule is not None:
+                        break
+            cached = (version, url, request_rule, response_rule)
+            flow.metadata["_relaycraft_bp_match"] = cached
+
+        rule = cached[2] if phase == "request" else cached[3]
+        if rule is not None:
+            self.logger.info(f"Breakpoint matched: {rule.get('pattern')} for {url} ({phase})")
+        return rule
 
     async def wait_for_resume(self, flow: http.HTTPFlow, phase: str, on_pause: Optional[Callable[[], Any]] = None, rule: Optional[Dict[str, Any]] = None) -> None:
         """Suspend execution and wait for user signal"""
@@ -159,8 +199,7 @@ class DebugManager:
             self.logger.info(f"Flow {flow_id} RESUMED.")
         finally:
             with self.lock:
-                if flow_id in self.intercepted_flows:
-                    del self.intercepted_flows[flow_id]
+                self.intercepted_flows.pop(flow_id, None)
 
     def resume_flow(self, flow_id: str, modified_data: Optional[Dict[str, Any]] = None) -> bool:
         """Signal a flow to resume, optionally applying modifications.
@@ -170,8 +209,8 @@ class DebugManager:
         thread will cause unsafe cross-thread asyncio.Event.set().
         """
         with self.lock:
-            if flow_id in self.intercepted_flows:
-                info = self.intercepted_flows[flow_id]
+            info = self.intercepted_flows.get(flow_id)
+            if info is not None:
                 flow = info["flow"]
 
                 if modified_data:
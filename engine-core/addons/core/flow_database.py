@@ -52,6 +52,9 @@ class FlowDatabase:
 
         # Thread-local storage for connections
         self._local = threading.local()
+        # Thread-local read-only connections (query_only) for maintenance
+        # reads that must not queue behind the write lock.
+        self._read_local = threading.local()
         # Write lock for write operations.
         # Use RLock so maintenance paths can safely call helpers that also lock.
         self._lock = threading.RLock()
@@ -91,6 +94,10 @@ class FlowDatabase:
         self._cleanup_stop_event = threading.Event()
         self._start_cleanup_thread()
 
+        # Start WAL checkpoint thread (independent cadence from cleanup)
+        self._wal_checkpoint_thread = None
+        self._start_wal_checkpoint_thread()
+
     # ==================== Session Helpers ====================
 
     def _get_or_reuse_session_id(self) -> str:
@@ -132,8 +139,9 @@ class FlowDatabase:
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA synchronous=NORMAL")
         conn.execute("PRAGMA foreign_keys=ON")
-        conn.execute("PRAGMA cache_size=-64000")
-        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA recursive_triggers=ON")
+        conn.execute("PRAGMA cache_size=-65536")       # 64 MiB
+        conn.execute("PRAGMA mmap_size=268435456")     # 256 MiB
         conn.execute("PRAGMA temp_store=MEMORY")
         conn.execute("PRAGMA wal_autocheckpoint=1000")
         conn.execute("PRAGMA busy_timeout=30000")
@@ -155,6 +163,19 @@ class FlowDatabase:
                 self._local.conn = self._create_connection()
         return self._local.conn
 
+    def _get_read_conn(self) -> sqlite3.Connection:
+        """Get thread-local read-only connection.
+
+        Reads see the latest committed WAL snapshot and never take the write
+        lock, so they keep working while a writer holds ``self._lock``.
+        """
+        conn = getattr(self._read_local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            conn.execute("PRAGMA query_only=1")
+            self._read_local.conn = conn
+        return conn
+
     def _execute_with_retry(self, operation_name: str, operation, max_retries: int = 3):
         """Execute a database operation with retry logic for transient errors."""
         last_error = None
@@ -201,8 +222,24 @@ class FlowDatabase:
     def _init_db(self):
         """Initialize database schema"""
         conn = self._get_conn()
+        existing_triggers = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        }
         conn.executescript(SCHEMA)
         self._ensure_flow_indices_columns(conn)
+        # One-time reconcile: counters are trigger-maintained from here on.
+        if "trg_flow_indices_ins" not in existing_triggers:
+            conn.execute("""
+                UPDATE sessions SET flow_count = (
+                    SELECT COUNT(*) FROM flow_indices WHERE session_id = sessions.id
+                )
+            """)
+        if "trg_flow_size_ins" not in existing_triggers:
+            conn.execute("""
+                UPDATE sessions SET total_size = (
+                    SELECT COALESCE(SUM(size), 0) FROM flow_indices WHERE session_id = sessions.id
+                )
+            """)
         conn.commit()
 
     def _ensure_flow_indices_columns(self, conn: sqlite3.Connection) -> None:
@@ -322,10 +359,6 @@ class FlowDatabase:
 
                     tick += 1
 
-                    idle_secs = time.time() - self._last_write_ts
-                    if idle_secs >= self._WAL_IDLE_TRUNCATE_SECS:
-                        _run_wal_checkpoint(self, 'TRUNCATE')
-
                     full_interval_ticks = max(1, int(Config.CLEANUP_INTERVAL / 10))
                     if tick % full_interval_ticks == 0:
                         write_idle = time.time() - self._last_write_ts
@@ -340,6 +373,7 @@ class FlowDatabase:
                 except Exception as e:
                     self.logger.error(f"Error in cleanup thread: {e}")
 
+            self._close_thread_connections()
             self.logger.info("Background cleanup thread stopped")
 
         self._cleanup_thread = threading.Thread(
@@ -350,15 +384,78 @@ class FlowDatabase:
         self._cleanup_thread.start()
 
     def _stop_cleanup_thread(self):
+        self._cleanup_stop_event.set()
         if self._cleanup_thread and self._cleanup_thread.is_alive():
-            self._cleanup_stop_event.set()
             self._cleanup_thread.join(timeout=5.0)
             if self._cleanup_thread.is_alive():
                 self.logger.warning("Cleanup thread did not stop gracefully")
+        if self._wal_checkpoint_thread and self._wal_checkpoint_thread.is_alive():
+            self._wal_checkpoint_thread.join(timeout=5.0)
+            if self._wal_checkpoint_thread.is_alive():
+                self.logger.warning("WAL checkpoint thread did not stop gracefully")
 
     def _maybe_cleanup(self):
         pass
 
+    # ==================== Background WAL Checkpoint Thread ====================
+
+    _WAL_CHECKPOINT_INTERVAL_SECS = 30
+    _WAL_BACKLOG_PAGES = 2048                   # ~8 MiB at 4 KiB pages
+    _WAL_ESCALATE_TICKS = 3
+    _WAL_ESCALATE_BYTES = 64 * 1024 * 1024
+
+    def _wal_size(self) -> int:
+        try:
+            return os.path.getsize(self.db_path + "-wal")
+        except OSError:
+            return 0
+
+    def _start_wal_checkpoint_thread(self):
+        """Start the background WAL checkpoint thread.
+
+        Runs PASSIVE every interval and escalates to TRUNCATE only when the
+        WAL keeps lagging behind and has grown large, or once writes go idle.
+        SQLite's own wal_autocheckpoint still handles the common case on
+        writer commits.
+        """
+        def checkpoint_worker():
+            lagging_ticks = 0
+            while not self._cleanup_stop_event.is_set():
+                try:
+                    self._cleanup_stop_event.wait(self._WAL_CHECKPOINT_INTERVAL_SECS)
+                    if self._cleanup_stop_event.is_set():
+                        break
+
+                    idle_secs = time.time() - self._last_write_ts
+                    if idle_secs >= self._WAL_IDLE_TRUNCATE_SECS:
+                        if self._wal_size() > 0:
+                            _run_wal_checkpoint(self, 'TRUNCATE')
+                        lagging_ticks = 0
+                        continue
+
+                    result = _run_wal_checkpoint(self, 'PASSIVE')
+                    if result and (result[0] > 0 or result[1] - result[2] > self._WAL_BACKLOG_PAGES):
+                        lagging_ticks += 1
+                    else:
+                        lagging_ticks = 0
+
+                    if (lagging_ticks >= self._WAL_ESCALATE_TICKS
+                            and self._wal_size() > self._WAL_ESCALATE_BYTES):
+                        _run_wal_checkpoint(self, 'TRUNCATE')
+                        lagging_ticks = 0
+
+                except Exception as e:
+                    self.logger.error(f"Error in WAL checkpoint thread: {e}")
+
+            self._close_thread_connections()
+
+        self._wal_checkpoint_thread = threading.Thread(
+            target=checkpoint_worker,
+            name="FlowDatabase-WalCheckpoint",
+            daemon=True
+        )
+        self._wal_checkpoint_thread.start()
+
     def _run_cleanup_background(self):
         """Run cleanup in background thread context."""
         with self._cleanup_lock:
@@ -370,9 +467,20 @@ class FlowDatabase:
 
     # ==================== Lifecycle ====================
 
-    def close(self):
-        """Close database connection and stop cleanup thread"""
-        self._stop_cleanup_thread()
+    def _close_thread_connections(self):
+        """Close the calling thread's write and read connections, if any.
+
+        Connections are thread-local, so background threads close their own
+        on exit; close() only reaches the thread that calls it.
+        """
         if hasattr(self, '_local') and hasattr(self._local, 'conn') and self._local.conn:
             self._local.conn.close()
             self._local.conn = None
+        if hasattr(self, '_read_local') and getattr(self._read_local, 'conn', None):
+            self._read_local.conn.close()
+            self._read_local.conn = None
+
+    def close(self):
+        """Close database connection and stop cleanup thread"""
+        self._stop_cleanup_thread()
+        self._close_thread_connections()
@@ -14,15 +14,23 @@ from .cleanup import (
     run_wal_checkpoint,
     vacuum,
 )
-from .export import export_to_file_iter, get_all_flows
+from .export import (
+    HAR_ENVELOPE_PREFIX,
+    HAR_ENVELOPE_SUFFIX,
+    export_to_file_iter,
+    get_all_flows,
+    iter_all_flows,
+)
 from .flow_repo import (
     build_flow_data_clean,
     extract_index,
     get_detail,
     get_flow_seq,
     get_indices,
+    get_poll_indices,
     insert_flow_rows,
     store_flow,
+    store_flow_group,
     store_flows_batch,
 )
 from .query_repo import get_flow_count, search_by_body, search_by_header, search_by_url
@@ -35,7 +43,6 @@ from .session_repo import (
     get_active_session,
     list_sessions,
     switch_session,
-    update_session_flow_count,
     update_session_import_status,
     update_session_metadata,
     update_session_stats,
@@ -50,7 +57,6 @@ __all__ = [
     "load_body",
     "create_new_session",
     "create_session",
-    "update_session_flow_count",
     "update_session_import_status",
     "update_session_metadata",
     "get_active_session",
@@ -62,13 +68,18 @@ __all__ = [
     "store_sse_events",
     "get_sse_events",
     "get_all_flows",
+    "iter_all_flows",
     "export_to_file_iter",
+    "HAR_ENVELOPE_PREFIX",
+    "HAR_ENVELOPE_SUFFIX",
     "build_flow_data_clean",
     "store_flow",
+    "store_flow_group",
     "insert_flow_rows",
     "store_flows_batch",
     "extract_index",
     "get_indices",
+    "get_poll_indices",
     "get_flow_seq",
     "get_detail",
     "run_wal_checkpoint",
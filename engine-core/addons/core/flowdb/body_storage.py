@@ -1,9 +1,45 @@
 """Body storage helpers for flow persistence."""
 
 import gzip
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
+# Recently compressed BLOB-tier bodies keyed by content digest. The same
+# bundle, image or API payload is often captured many times, and gzip costs
+# far more than hashing, so repeats reuse the earlier compressed bytes.
+# Only bodies up to _COMPRESS_CACHE_MAX_BODY are hashed and cached.
+_COMPRESS_CACHE_MAX_BODY = 256 * 1024
+_COMPRESS_CACHE_MAX_BYTES = 2 * 1024 * 1024
+_compress_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+_compress_cache_bytes = 0
+_compress_cache_lock = threading.Lock()
+
+
+def _compress(data: bytes) -> bytes:
+    """gzip-compress ``data``, reusing the result for recently seen content."""
+    global _compress_cache_bytes
+    if len(data) > _COMPRESS_CACHE_MAX_BODY:
+        return gzip.compress(data)
+    key = hashlib.blake2b(data, digest_size=16).digest()
+    with _compress_cache_lock:
+        compressed = _compress_cache.get(key)
+        if compressed is not None:
+            _compress_cache.move_to_end(key)
+            return compressed
+
+    compressed = gzip.compress(data)
+    with _compress_cache_lock:
+        if key not in _compress_cache:
+            _compress_cache[key] = compressed
+            _compress_cache_bytes += len(compressed)
+            while _compress_cache_bytes > _COMPRESS_CACHE_MAX_BYTES:
+                _, evicted = _compress_cache.popitem(last=False)
+                _compress_cache_bytes -= len(evicted)
+    return compressed
+
 
 def process_body(
     body_dir: str,
@@ -21,7 +57,8 @@ def process_body(
     if not body:
         return None, "inline"
 
-    size = len(body.encode("utf-8"))
+    data = body.encode("utf-8")
+    size = len(data)
 
     # Too large - skip
     if size > config.MAX_PERSIST_SIZE:
@@ -33,8 +70,7 @@ def process_body(
 
     # Medium - compress to BLOB
     if size < config.FILE_THRESHOLD:
-        compressed = gzip.compress(body.encode("utf-8"))
-        return compressed, "compressed"
+        return _compress(data), "compressed"
 
     # Large - store as file
     filename = f"{flow_id}_{body_type[0]}.dat"
@@ -42,8 +78,8 @@ def process_body(
     session_dir.mkdir(parents=True, exist_ok=True)
 
     filepath = session_dir / filename
-    with gzip.open(filepath, "wt", encoding="utf-8") as f:
-        f.write(body)
+    # Same gzip stream gzip.open(..., "wt") would produce; read back by load_body
+    filepath.write_bytes(gzip.compress(data))
 
     return None, f"file:{filename}"
 
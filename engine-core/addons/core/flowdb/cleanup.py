@@ -5,11 +5,14 @@ import shutil
 import sqlite3
 import time
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from .schema import Config
 
+_BODY_SUFFIXES = ("_r.dat", "_s.dat", "_req.dat", "_res.dat")
+
 
 def _chunked(items: Sequence[str], size: int = 500) -> List[List[str]]:
     if not items:
@@ -17,16 +20,31 @@ def _chunked(items: Sequence[str], size: int = 500) -> List[List[str]]:
     return [list(items[i : i + size]) for i in range(0, len(items), size)]
 
 
+@lru_cache(maxsize=32)
+def _delete_statements(count: int) -> Tuple[str, str, str]:
+    """Build the per-table DELETE statements for a chunk of ``count`` ids once.
+
+    Identical SQL text also lets sqlite3 reuse its prepared statements.
+    """
+    placeholders = ",".join("?" * count)
+    return (
+        f"DELETE FROM flow_bodies WHERE flow_id IN ({placeholders})",
+        f"DELETE FROM flow_details WHERE id IN ({placeholders})",
+        f"DELETE FROM flow_indices WHERE id IN ({placeholders})",
+    )
+
+
 def _delete_flows(conn, flow_ids: Sequence[str]) -> int:
     if not flow_ids:
         return 0
 
     deleted = 0
-    for chunk in _chunked(list(flow_ids), 500):
-        placeholders = ",".join("?" for _ in chunk)
-        conn.execute(f"DELETE FROM flow_bodies WHERE flow_id IN ({placeholders})", chunk)
-        conn.execute(f"DELETE FROM flow_details WHERE id IN ({placeholders})", chunk)
-        conn.execute(f"DELETE FROM flow_indices WHERE id IN ({placeholders})", chunk)
+    execute = conn.execute
+    for chunk in _chunked(flow_ids, 500):
+        del_bodies, del_details, del_indices = _delete_statements(len(chunk))
+        execute(del_bodies, chunk)
+        execute(del_details, chunk)
+        execute(del_indices, chunk)
         deleted += len(chunk)
     return deleted
 
@@ -42,8 +60,11 @@ def _collect_flow_targets(rows) -> Tuple[List[str], Dict[str, List[str]]]:
     return flow_ids, session_flows
 
 
-def run_wal_checkpoint(db, mode: str = "PASSIVE"):
-    """Run WAL checkpoint."""
+def run_wal_checkpoint(db, mode: str = "PASSIVE") -> Optional[Tuple[int, int, int]]:
+    """Run WAL checkpoint.
+
+    Returns the ``(busy, log_pages, checkpointed_pages)`` row, or None on error.
+    """
     valid_wal_modes = {"PASSIVE", "TRUNCATE", "RESTART", "FULL"}
     mode = mode.upper()
     if mode not in valid_wal_modes:
@@ -64,48 +85,62 @@ def run_wal_checkpoint(db, mode: str = "PASSIVE"):
                     )
                 elif busy > 0:
                     db.logger.debug(f"WAL PASSIVE checkpoint busy: {result}")
+                return busy, log_pages, checkpointed
     except sqlite3.Error as e:
         db.logger.warning(f"WAL checkpoint ({mode}) error: {e}")
+    return None
 
 
 def run_cleanup(db):
     """Clean up old data and enforce total flow limit."""
-    # Serialize cleanup with writes; avoids concurrent write transactions
-    # from cleanup thread and capture path on separate SQLite connections.
-    with db._lock:
-        conn = db._get_conn()
-        cleanup_start = time.time()
-        deleted_flows = 0
-        deleted_sessions = 0
-
-        if Config.MAX_FLOW_AGE_DAYS > 0:
-            age_threshold = time.time() - (Config.MAX_FLOW_AGE_DAYS * 24 * 60 * 60)
-            old_flows = conn.execute(
+    cleanup_start = time.time()
+    deleted_flows = 0
+    deleted_sessions = 0
+    body_targets: List[Tuple[str, Optional[List[str]]]] = []
+
+    # Candidate selection runs on a read-only connection before taking the
+    # write lock: under WAL it reads a committed snapshot, so polling and
+    # capture are not blocked while we scan flow_indices. Rows inserted
+    # meanwhile are newer than every candidate, so the estimate stays safe.
+    read_conn = db._get_read_conn()
+
+    aged_flows = []
+    age_threshold = None
+    if Config.MAX_FLOW_AGE_DAYS > 0:
+        age_threshold = time.time() - (Config.MAX_FLOW_AGE_DAYS * 24 * 60 * 60)
+        aged_flows = read_conn.execute(
+            """
+            SELECT id, session_id FROM flow_indices
+            WHERE msg_ts < ?
+            """,
+            (age_threshold,),
+        ).fetchall()
+    aged_count = len(aged_flows)
+
+    # sessions.flow_count is trigger-maintained: summing it is O(#sessions)
+    # and lets the total-limit branch bail out without touching flow_indices.
+    total_count = read_conn.execute(
+        "SELECT COALESCE(SUM(flow_count), 0) FROM sessions"
+    ).fetchone()[0]
+
+    excess = 0
+    excess_flows = []
+    if total_count - aged_count > Config.MAX_TOTAL_FLOWS:
+        excess = total_count - aged_count - Config.MAX_TOTAL_FLOWS
+        if age_threshold is not None:
+            # Aged rows are already scheduled; skip them so the two sets
+            # never overlap.
+            excess_flows = read_conn.execute(
                 """
                 SELECT id, session_id FROM flow_indices
-                WHERE msg_ts < ?
+                WHERE msg_ts >= ?
+                ORDER BY msg_ts ASC
+                LIMIT ?
                 """,
-                (age_threshold,),
+                (age_threshold, excess),
             ).fetchall()
-
-            if old_flows:
-                db.logger.info(
-                    f"Deleting {len(old_flows)} flows older than {Config.MAX_FLOW_AGE_DAYS} days"
-                )
-                flow_ids, session_flows = _collect_flow_targets(old_flows)
-                for session_id, session_flow_ids in session_flows.items():
-                    delete_body_files(db, session_id, session_flow_ids)
-                deleted_flows += _delete_flows(conn, flow_ids)
-
-        total_count = conn.execute("SELECT COUNT(*) FROM flow_indices").fetchone()[0]
-
-        if total_count > Config.MAX_TOTAL_FLOWS:
-            excess = total_count - Config.MAX_TOTAL_FLOWS
-            db.logger.info(
-                f"Total flows ({total_count}) exceeds limit ({Config.MAX_TOTAL_FLOWS}), "
-                f"deleting {excess} oldest flows"
-            )
-            old_flows = conn.execute(
+        else:
+            excess_flows = read_conn.execute(
                 """
                 SELECT id, session_id FROM flow_indices
                 ORDER BY msg_ts ASC
@@ -113,18 +148,20 @@ def run_cleanup(db):
                 """,
                 (excess,),
             ).fetchall()
-            flow_ids, session_flows = _collect_flow_targets(old_flows)
-            for session_id, session_flow_ids in session_flows.items():
-                delete_body_files(db, session_id, session_flow_ids)
-            deleted_flows += _delete_flows(conn, flow_ids)
 
-        conn.execute(
-            """
-            UPDATE sessions SET flow_count = (
-                SELECT COUNT(*) FROM flow_indices WHERE session_id = sessions.id
-            )
-            """
-        )
+    # Serialize cleanup with writes; avoids concurrent write transactions
+    # from cleanup thread and capture path on separate SQLite connections.
+    # Only SQL runs under the lock: file I/O, stats, notifications and
+    # logging happen after commit so store_flow is not kept waiting.
+    with db._lock:
+        conn = db._get_conn()
+
+        for target_rows in (aged_flows, excess_flows):
+            if not target_rows:
+                continue
+            flow_ids, session_flows = _collect_flow_targets(target_rows)
+            body_targets.extend(session_flows.items())
+            deleted_flows += _delete_flows(conn, flow_ids)
 
         empty_sessions = conn.execute(
             """
@@ -135,78 +172,98 @@ def run_cleanup(db):
             """
         ).fetchall()
 
-        for row in empty_sessions:
-            from .session_repo import delete_session
-            delete_session(db, row["id"])
-            deleted_sessions += 1
-
-        db_size_mb = 0
-        try:
-            db_size_mb = os.path.getsize(db.db_path) / (1024 * 1024)
-            if db_size_mb > Config.MAX_DB_SIZE_MB:
-                db.logger.warning(
-                    f"Database size ({db_size_mb:.1f}MB) exceeds "
-                    f"limit ({Config.MAX_DB_SIZE_MB}MB)."
-                )
-                db.push_notification(
-                    title_key="database.notifications.storage_warning_title",
-                    message_key="database.notifications.storage_warning_msg",
-                    params={"size_mb": f"{db_size_mb:.0f}"},
-                    n_type="warning",
-                    priority="high",
-                )
-        except Exception as e:
-            db.logger.debug(f"DB size check failed: {e}")
-
-        checkpoint_result = None
-        try:
-            checkpoint_result = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
-            if checkpoint_result and checkpoint_result[0] > 0:
-                db.logger.debug(f"WAL checkpoint partial: {checkpoint_result}")
-        except Exception as e:
-            db.logger.debug(f"WAL checkpoint failed: {e}")
+        if empty_sessions:
+            # Same predicate as the SELECT; writers are serialized by the
+            # lock, so this deletes exactly the rows collected above.
+            conn.execute(
+                """
+                DELETE FROM sessions
+                WHERE id != 'default'
+                AND is_active = 0
+                AND flow_count = 0
+                """
+            )
+            deleted_sessions = len(empty_sessions)
+            body_targets.extend((row["id"], None) for row in empty_sessions)
 
         try:
             conn.execute("PRAGMA optimize")
         except Exception as e:
             db.logger.debug(f"PRAGMA optimize failed: {e}")
 
-        integrity_ok = True
-        if db_size_mb < 1000:
-            try:
-                result = conn.execute("PRAGMA quick_check").fetchone()
-                integrity_ok = result[0] == "ok" if result else False
-                if not integrity_ok:
-                    db.logger.error(f"Database integrity check failed: {result}")
-            except Exception as e:
-                db.logger.debug(f"Integrity check failed: {e}")
-
         conn.commit()
 
-        if deleted_flows > max(1000, total_count * 0.1):
-            db.logger.info(f"Running VACUUM after deleting {deleted_flows} flows...")
+    for session_id, session_flow_ids in body_targets:
+        delete_body_files(db, session_id, session_flow_ids)
+
+    if aged_count:
+        db.logger.info(
+            f"Deleted {aged_count} flows older than {Config.MAX_FLOW_AGE_DAYS} days"
+        )
+    if excess:
+        db.logger.info(
+            f"Total flows ({total_count}) exceeded limit ({Config.MAX_TOTAL_FLOWS}), "
+            f"deleted {excess} oldest flows"
+        )
+
+    db_size_mb = 0
+    try:
+        db_size_mb = os.path.getsize(db.db_path) / (1024 * 1024)
+        if db_size_mb > Config.MAX_DB_SIZE_MB:
+            db.logger.warning(
+                f"Database size ({db_size_mb:.1f}MB) exceeds "
+                f"limit ({Config.MAX_DB_SIZE_MB}MB)."
+            )
+            db.push_notification(
+                title_key="database.notifications.storage_warning_title",
+                message_key="database.notifications.storage_warning_msg",
+                params={"size_mb": f"{db_size_mb:.0f}"},
+                n_type="warning",
+                priority="high",
+            )
+    except Exception as e:
+        db.logger.debug(f"DB size check failed: {e}")
+
+    # quick_check is read-only; under WAL it runs against a snapshot and
+    # does not need to block writers.
+    integrity_ok = True
+    if db_size_mb < 1000:
+        try:
+            result = read_conn.execute("PRAGMA quick_check").fetchone()
+            integrity_ok = result[0] == "ok" if result else False
+            if not integrity_ok:
+                db.logger.error(f"Database integrity check failed: {result}")
+        except Exception as e:
+            db.logger.debug(f"Integrity check failed: {e}")
+
+    if deleted_flows > max(1000, total_count * 0.1):
+        db.logger.info(f"Running VACUUM after deleting {deleted_flows} flows...")
+        # Re-acquire the lock just for VACUUM instead of holding it across
+        # the whole cleanup pass.
+        with db._lock:
             try:
+                conn = db._get_conn()
                 conn.execute("VACUUM")
                 conn.commit()
             except Exception as e:
                 db.logger.error(f"VACUUM failed: {e}")
 
-        cleanup_time = (time.time() - cleanup_start) * 1000
-        db.logger.info(
-            f"Cleanup: deleted {deleted_sessions} sessions, {deleted_flows} flows "
-            f"in {cleanup_time:.0f}ms "
-            f"(db={db_size_mb:.0f}MB, integrity={'ok' if integrity_ok else 'FAIL'})"
+    cleanup_time = (time.time() - cleanup_start) * 1000
+    db.logger.info(
+        f"Cleanup: deleted {deleted_sessions} sessions, {deleted_flows} flows "
+        f"in {cleanup_time:.0f}ms "
+        f"(db={db_size_mb:.0f}MB, integrity={'ok' if integrity_ok else 'FAIL'})"
+    )
+
+    if deleted_flows > 0 or deleted_sessions > 0:
+        db.push_notification(
+            title_key="database.notifications.cleanup_title",
+            message_key="database.notifications.cleanup_msg",
+            params={"flows": deleted_flows, "sessions": deleted_sessions},
+            n_type="info",
+            priority="low",
         )
 
-        if deleted_flows > 0 or deleted_sessions > 0:
-            db.push_notification(
-                title_key="database.notifications.cleanup_title",
-                message_key="database.notifications.cleanup_msg",
-                params={"flows": deleted_flows, "sessions": deleted_sessions},
-                n_type="info",
-                priority="low",
-            )
-
 
 def delete_body_files(db, session_id: str, flow_ids: List[str] = None):
     """Delete body files for given flows or entire session directory."""
@@ -222,14 +279,16 @@ def delete_body_files(db, session_id: str, flow_ids: List[str] = None):
         except Exception as e:
             db.logger.error(f"Error removing session directory {session_dir}: {e}")
     else:
+        # Most suffixes don't exist for a given flow; a failed unlink is one
+        # syscall where exists()+unlink() costs a stat on every miss.
+        dir_prefix = os.path.join(str(session_dir), "")
         for flow_id in flow_ids:
-            for suffix in ["_r.dat", "_s.dat", "_req.dat", "_res.dat"]:
-                filepath = session_dir / f"{flow_id}{suffix}"
-                if filepath.exists():
-                    try:
-                        filepath.unlink()
-                    except OSError:
-                        pass
+            prefix = dir_prefix + flow_id
+            for suffix in _BODY_SUFFIXES:
+                try:
+                    os.unlink(prefix + suffix)
+                except OSError:
+                    pass
 
 
 def clear_session(db, session_id: str = None):
@@ -262,7 +321,8 @@ def get_stats(db) -> Dict:
     conn = db._get_conn()
     sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
     total_flows = conn.execute("SELECT COUNT(*) FROM flow_indices").fetchone()[0]
-    total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM flow_indices").fetchone()[0]
+    # sessions.total_size is trigger-maintained; avoids a scan over every flow
+    total_size = conn.execute("SELECT COALESCE(SUM(total_size), 0) FROM sessions").fetchone()[0]
 
     db_size = os.path.getsize(db.db_path) if os.path.exists(db.db_path) else 0
 
@@ -3,61 +3,70 @@
 import gzip
 import json
 import time
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 
-def get_all_flows(db, session_id: str = None) -> List[Dict]:
-    """Get all flows for export using batch loading."""
-    session_id = db._get_session_id(session_id)
-    conn = db._get_conn()
+# Constant HAR wrapper around the entries array, written as-is by both the
+# file export and the /_relay/export_har response
+HAR_ENVELOPE_PREFIX = '{"log":{"version":"1.2","creator":{"name":"RelayCraft","version":"1.0"},"entries":'
+HAR_ENVELOPE_SUFFIX = "}}"
 
-    rows = conn.execute(
-        """
-        SELECT fd.id, fd.data, fd.request_body_ref, fd.response_body_ref
-        FROM flow_details fd
-        JOIN flow_indices fi ON fd.id = fi.id
-        WHERE fd.session_id = ?
-        ORDER BY fi.msg_ts
-        """,
-        (session_id,),
-    ).fetchall()
+# Driven by idx_indices_session_ts so rows come back in capture order
+# without a sort step, with bodies joined per row through their
+# "<flow_id>_req"/"_res" key: an export never holds more than the current
+# flow's bodies in memory.
+_EXPORT_FLOWS_SQL = """
+    SELECT fd.id, fd.data, fd.request_body_ref, fd.response_body_ref,
+           req.data AS request_body, res.data AS response_body
+    FROM flow_indices fi
+    JOIN flow_details fd ON fd.id = fi.id
+    LEFT JOIN flow_bodies req ON req.id = fd.id || '_req'
+    LEFT JOIN flow_bodies res ON res.id = fd.id || '_res'
+    WHERE fi.session_id = ?
+    ORDER BY fi.msg_ts
+"""
 
-    body_cache = {}
-    body_rows = conn.execute(
-        "SELECT flow_id, type, data FROM flow_bodies WHERE session_id = ?",
-        (session_id,),
-    ).fetchall()
-    for row in body_rows:
-        key = (row["flow_id"], row["type"])
-        body_cache[key] = row["data"]
 
-    flows = []
-    for row in rows:
+def _export_flow(row) -> Dict:
+    """Rebuild a stored flow with its compressed bodies inlined."""
+    flow_data = json.loads(row["data"])
+
+    if row["request_body_ref"] == "compressed" and row["request_body"] is not None:
+        body = gzip.decompress(row["request_body"]).decode("utf-8")
+        if flow_data.get("request", {}).get("postData"):
+            flow_data["request"]["postData"]["text"] = body
+
+    if row["response_body_ref"] == "compressed" and row["response_body"] is not None:
+        body = gzip.decompress(row["response_body"]).decode("utf-8")
+        if flow_data.get("response", {}).get("content"):
+            flow_data["response"]["content"]["text"] = body
+
+    return flow_data
+
+
+def _iter_export_rows(conn, session_id: str) -> Iterator[Dict]:
+    for row in conn.execute(_EXPORT_FLOWS_SQL, (session_id,)):
         try:
-            flow_data = json.loads(row["data"])
-            flow_id = row["id"]
-            req_ref = row["request_body_ref"]
-            res_ref = row["response_body_ref"]
-
-            if req_ref and req_ref == "compressed":
-                cache_key = (flow_id, "request")
-                if cache_key in body_cache:
-                    body = gzip.decompress(body_cache[cache_key]).decode("utf-8")
-                    if flow_data.get("request", {}).get("postData"):
-                        flow_data["request"]["postData"]["text"] = body
-
-            if res_ref and res_ref == "compressed":
-                cache_key = (flow_id, "response")
-                if cache_key in body_cache:
-                    body = gzip.decompress(body_cache[cache_key]).decode("utf-8")
-                    if flow_data.get("response", {}).get("content"):
-                        flow_data["response"]["content"]["text"] = body
-
-            flows.append(flow_data)
+            flow_data = _export_flow(row)
         except Exception:
-            pass
+            continue
+        yield flow_data
 
-    return flows
+
+def iter_all_flows(db, session_id: str = None) -> Iterator[Dict]:
+    """Yield flows for export one at a time, in capture order.
+
+    Rows are decoded lazily, so a caller that serializes as it goes never
+    holds more than one decoded flow at once.
+    """
+    session_id = db._get_session_id(session_id)
+    conn = db._get_conn()
+    yield from _iter_export_rows(conn, session_id)
+
+
+def get_all_flows(db, session_id: str = None) -> List[Dict]:
+    """Get all flows for export using batch loading."""
+    return list(iter_all_flows(db, session_id=session_id))
 
 
 def export_to_file_iter(
@@ -80,10 +89,7 @@ def export_to_file_iter(
     if total == 0:
         with open(file_path, "w", encoding="utf-8") as f:
             if format == "har":
-                json.dump(
-                    {"log": {"version": "1.2", "creator": {"name": "RelayCraft", "version": "1.0"}, "entries": []}},
-                    f,
-                )
+                f.write(HAR_ENVELOPE_PREFIX + "[]" + HAR_ENVELOPE_SUFFIX)
             else:
                 inner_meta = metadata.get("metadata", {}) if metadata else {}
                 session_metadata = {
@@ -105,29 +111,9 @@ def export_to_file_iter(
                 json.dump(session_obj, f, ensure_ascii=False)
         return
 
-    body_cache = {}
-    body_rows = conn.execute(
-        "SELECT flow_id, type, data FROM flow_bodies WHERE session_id = ?",
-        (session_id,),
-    ).fetchall()
-    for row in body_rows:
-        key = (row["flow_id"], row["type"])
-        body_cache[key] = row["data"]
-
-    cursor = conn.execute(
-        """
-        SELECT fd.id, fd.data, fd.request_body_ref, fd.response_body_ref
-        FROM flow_details fd
-        JOIN flow_indices fi ON fd.id = fi.id
-        WHERE fd.session_id = ?
-        ORDER BY fi.msg_ts
-        """,
-        (session_id,),
-    )
-
     with open(file_path, "w", encoding="utf-8") as f:
         if format == "har":
-            f.write('{"log":{"version":"1.2","creator":{"name":"RelayCraft","version":"1.0"},"entries":[')
+            f.write(HAR_ENVELOPE_PREFIX + "[")
         else:
             inner_meta = metadata.get("metadata", {}) if metadata else {}
             session_metadata = {
@@ -153,27 +139,8 @@ def export_to_file_iter(
         first = True
         current = 0
 
-        for row in cursor:
+        for flow_data in _iter_export_rows(conn, session_id):
             try:
-                flow_data = json.loads(row["data"])
-                flow_id = row["id"]
-                req_ref = row["request_body_ref"]
-                res_ref = row["response_body_ref"]
-
-                if req_ref and req_ref == "compressed":
-                    cache_key = (flow_id, "request")
-                    if cache_key in body_cache:
-                        body = gzip.decompress(body_cache[cache_key]).decode("utf-8")
-                        if flow_data.get("request", {}).get("postData"):
-                            flow_data["request"]["postData"]["text"] = body
-
-                if res_ref and res_ref == "compressed":
-                    cache_key = (flow_id, "response")
-                    if cache_key in body_cache:
-                        body = gzip.decompress(body_cache[cache_key]).decode("utf-8")
-                        if flow_data.get("response", {}).get("content"):
-                            flow_data["response"]["content"]["text"] = body
-
                 if not first:
                     f.write(",")
                 first = False
@@ -187,7 +154,7 @@ def export_to_file_iter(
                 pass
 
         if format == "har":
-            f.write("]}}")
+            f.write("]" + HAR_ENVELOPE_SUFFIX)
         else:
             f.write("]}")
 
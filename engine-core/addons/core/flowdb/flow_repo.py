@@ -4,6 +4,7 @@ import json
 import time
 from typing import Dict, List, Optional, Tuple
 
+from ..json_codec import dump_json_str
 from .body_storage import get_placeholder
 
 
@@ -40,21 +41,12 @@ def build_flow_data_clean(flow_data: Dict, req_ref: str, res_ref: str) -> str:
             return float(obj)
         raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-    return json.dumps(flow_copy, ensure_ascii=False, default=decimal_default)
+    return dump_json_str(flow_copy, decimal_default)
 
 
-def store_flow(db, flow_data: Dict, session_id: str = None, update_session_ts: bool = True) -> bool:
-    """Store a flow with tiered body storage."""
-    t0 = time.time()
-
-    session_id = db._get_session_id(session_id)
-    if not session_id:
-        return False
-
-    flow_id = flow_data.get("id")
-    if not flow_id:
-        return False
-
+def _prepare_flow_rows(db, flow_data: Dict, session_id: str) -> Tuple:
+    """Build index fields, body storage and detail JSON for one flow (no DB writes)."""
+    flow_id = flow_data["id"]
     index_data = extract_index(db, flow_data, session_id)
 
     req = flow_data.get("request") or {}
@@ -73,6 +65,24 @@ def store_flow(db, flow_data: Dict, session_id: str = None, update_session_ts: b
     )
 
     detail_json = build_flow_data_clean(flow_data, req_ref, res_ref)
+    return flow_id, index_data, detail_json, req_body, req_ref, res_body, res_ref
+
+
+def store_flow(db, flow_data: Dict, session_id: str = None, update_session_ts: bool = True) -> bool:
+    """Store a flow with tiered body storage."""
+    t0 = time.time()
+
+    session_id = db._get_session_id(session_id)
+    if not session_id:
+        return False
+
+    flow_id = flow_data.get("id")
+    if not flow_id:
+        return False
+
+    _, index_data, detail_json, req_body, req_ref, res_body, res_ref = _prepare_flow_rows(
+        db, flow_data, session_id
+    )
 
     with db._lock:
         conn = db._get_conn()
@@ -111,6 +121,71 @@ def store_flow(db, flow_data: Dict, session_id: str = None, update_session_ts: b
     return True
 
 
+def store_flow_group(db, items: List[Tuple[Dict, str]]) -> int:
+    """Store queued live captures, as (flow_data, session_id) pairs, in one transaction.
+
+    Unlike store_flows_batch, items may span sessions and repeat a flow id
+    (later snapshots win). If the shared commit fails, each flow is retried
+    on its own so one bad row does not drop its neighbours.
+    """
+    t0 = time.time()
+    prepared: List[Tuple] = []
+    for flow_data, session_id in items:
+        session_id = db._get_session_id(session_id)
+        if not session_id or not flow_data.get("id"):
+            continue
+        try:
+            prepared.append((session_id,) + _prepare_flow_rows(db, flow_data, session_id))
+        except Exception as e:
+            db.logger.error(f"store_flow_group: skipping flow {flow_data.get('id')}: {e}")
+    if not prepared:
+        return 0
+
+    with db._lock:
+        conn = db._get_conn()
+        try:
+            for session_id, flow_id, index_data, detail_json, req_body, req_ref, res_body, res_ref in prepared:
+                insert_flow_rows(
+                    db,
+                    conn,
+                    flow_id,
+                    session_id,
+                    index_data,
+                    detail_json,
+                    req_body,
+                    req_ref,
+                    res_body,
+                    res_ref,
+                )
+            now = time.time()
+            conn.executemany(
+                "UPDATE sessions SET updated_at = ? WHERE id = ?",
+                [(now, sid) for sid in {row[0] for row in prepared}],
+            )
+            conn.commit()
+            db._last_write_ts = time.time()
+        except Exception as e:
+            conn.rollback()
+            db.logger.warning(f"store_flow_group: group commit failed, storing individually: {e}")
+            prepared = None
+
+    if prepared is None:
+        stored = 0
+        for flow_data, session_id in items:
+            try:
+                stored += bool(store_flow(db, flow_data, session_id))
+            except Exception as e:
+                db.logger.error(f"Error storing flow to database: {e}")
+        return stored
+
+    elapsed_ms = (time.time() - t0) * 1000
+    if elapsed_ms > 200:
+        db.logger.warning(f"store_flow_group SLOW ({elapsed_ms:.0f}ms): {len(prepared)} flows")
+
+    db._maybe_cleanup()
+    return len(prepared)
+
+
 def insert_flow_rows(
     db,
     conn,
@@ -208,23 +283,7 @@ def store_flows_batch(db, flows: List[Dict], session_id: str, batch_size: int =
         if not flow_id:
             continue
         try:
-            index_data = extract_index(db, flow_data, session_id)
-            req = flow_data.get("request") or {}
-            res = flow_data.get("response") or {}
-            req_body, req_ref = db._process_body(
-                flow_id,
-                session_id,
-                (req.get("postData") or {}).get("text", ""),
-                "request",
-            )
-            res_body, res_ref = db._process_body(
-                flow_id,
-                session_id,
-                (res.get("content") or {}).get("text", ""),
-                "response",
-            )
-            detail_json = build_flow_data_clean(flow_data, req_ref, res_ref)
-            prepared.append((flow_id, index_data, detail_json, req_body, req_ref, res_body, res_ref))
+            prepared.append(_prepare_flow_rows(db, flow_data, session_id))
         except Exception as e:
             db.logger.warning(f"store_flows_batch: skipping flow {flow_id}: {e}")
             errors += 1
@@ -323,8 +382,54 @@ def extract_index(db, flow_data: Dict, session_id: str) -> Dict:
     }
 
 
-def get_indices(db, session_id: str = None, since: float = 0, limit: int = None) -> List[Dict]:
-    """Get flow indices for polling."""
+# flow_indices column -> poll wire key, in the order the UI expects them
+_POLL_INDEX_COLUMNS = (
+    ("id", "id"),
+    ("method", "method"),
+    ("url", "url"),
+    ("host", "host"),
+    ("path", "path"),
+    ("status", "status"),
+    ("http_version", "httpVersion"),
+    ("content_type", "contentType"),
+    ("started_datetime", "startedDateTime"),
+    ("time", "time"),
+    ("size", "size"),
+    ("client_ip", "clientIp"),
+    ("app_name", "appName"),
+    ("app_display_name", "appDisplayName"),
+    ("has_error", "hasError"),
+    ("has_request_body", "hasRequestBody"),
+    ("has_response_body", "hasResponseBody"),
+    ("is_websocket", "isWebsocket"),
+    ("is_sse", "isSse"),
+    ("websocket_frame_count", "websocketFrameCount"),
+    ("is_intercepted", "isIntercepted"),
+    ("hits", "hits"),
+    ("msg_ts", "msg_ts"),
+)
+_POLL_INDEX_KEYS = tuple(key for _, key in _POLL_INDEX_COLUMNS)
+_POLL_INDEX_SELECT = ", ".join(column for column, _ in _POLL_INDEX_COLUMNS)
+_POLL_BOOL_KEYS = (
+    "hasError",
+    "hasRequestBody",
+    "hasResponseBody",
+    "isWebsocket",
+    "isSse",
+    "isIntercepted",
+)
+
+
+def _parse_hits(raw) -> List:
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def _query_indices(db, name: str, columns: str, session_id, since: float, limit, build_item) -> List[Dict]:
     import time as time_module
 
     t0 = time_module.time()
@@ -337,8 +442,8 @@ def get_indices(db, session_id: str = None, since: float = 0, limit: int = None)
     def _query(conn):
         t1 = time_module.time()
 
-        query = """
-            SELECT * FROM flow_indices
+        query = f"""
+            SELECT {columns} FROM flow_indices
             WHERE session_id = ? AND msg_ts >= ?
             ORDER BY msg_ts ASC
         """
@@ -351,23 +456,13 @@ def get_indices(db, session_id: str = None, since: float = 0, limit: int = None)
         rows = conn.execute(query, params).fetchall()
         t2 = time_module.time()
 
-        result = []
-        for row in rows:
-            item = dict(row)
-            if item.get("hits"):
-                try:
-                    item["hits"] = json.loads(item["hits"])
-                except (json.JSONDecodeError, TypeError):
-                    item["hits"] = []
-            else:
-                item["hits"] = []
-            result.append(item)
+        result = [build_item(row) for row in rows]
         t3 = time_module.time()
 
         total_ms = (t3 - t0) * 1000
         if total_ms > 100 or len(result) > 100:
             db.logger.info(
-                f"get_indices ({total_ms:.0f}ms, {len(result)} rows): "
+                f"{name} ({total_ms:.0f}ms, {len(result)} rows): "
                 f"session={(t1-t0)*1000:.0f}ms, "
                 f"query={(t2-t1)*1000:.0f}ms, "
                 f"parse={(t3-t2)*1000:.0f}ms"
@@ -375,7 +470,36 @@ def get_indices(db, session_id: str = None, since: float = 0, limit: int = None)
 
         return result
 
-    return db._execute_with_retry("get_indices", _query)
+    return db._execute_with_retry(name, _query)
+
+
+def _index_item(row) -> Dict:
+    item = dict(row)
+    item["hits"] = _parse_hits(item.get("hits"))
+    return item
+
+
+def _poll_index_item(row) -> Dict:
+    item = dict(zip(_POLL_INDEX_KEYS, row))
+    for key in _POLL_BOOL_KEYS:
+        item[key] = bool(item[key])
+    item["hits"] = _parse_hits(item["hits"])
+    return item
+
+
+def get_indices(db, session_id: str = None, since: float = 0, limit: int = None) -> List[Dict]:
+    """Get flow indices for polling."""
+    return _query_indices(db, "get_indices", "*", session_id, since, limit, _index_item)
+
+
+def get_poll_indices(db, session_id: str = None, since: float = 0, limit: int = None) -> List[Dict]:
+    """Get flow indices already shaped for the /_relay/poll payload.
+
+    flow_indices is the projection written once at ingest; selecting its
+    columns in wire order lets each row map straight onto the poll keys
+    instead of being re-keyed field by field on every poll.
+    """
+    return _query_indices(db, "get_poll_indices", _POLL_INDEX_SELECT, session_id, since, limit, _poll_index_item)
 
 
 def get_flow_seq(db, flow_id: str) -> Optional[int]:
@@ -123,9 +123,32 @@ CREATE TABLE IF NOT EXISTS sse_events (
 CREATE INDEX IF NOT EXISTS idx_indices_session_ts ON flow_indices(session_id, msg_ts DESC);
 CREATE INDEX IF NOT EXISTS idx_indices_session_host ON flow_indices(session_id, host);
 CREATE INDEX IF NOT EXISTS idx_indices_session_status ON flow_indices(session_id, status);
+-- Global oldest-first scans in cleanup (covering: no table lookups)
+CREATE INDEX IF NOT EXISTS idx_indices_msg_ts ON flow_indices(msg_ts, id, session_id);
 CREATE INDEX IF NOT EXISTS idx_details_session ON flow_details(session_id);
 CREATE INDEX IF NOT EXISTS idx_details_id ON flow_details(id);
 CREATE INDEX IF NOT EXISTS idx_bodies_flow ON flow_bodies(flow_id);
 CREATE INDEX IF NOT EXISTS idx_sse_events_flow_seq ON sse_events(flow_id, seq);
 CREATE INDEX IF NOT EXISTS idx_sse_events_session_flow ON sse_events(session_id, flow_id);
+
+-- Session flow counters (kept incrementally; requires recursive_triggers so
+-- INSERT OR REPLACE fires the delete trigger for the replaced row)
+CREATE TRIGGER IF NOT EXISTS trg_flow_indices_ins AFTER INSERT ON flow_indices
+BEGIN
+    UPDATE sessions SET flow_count = flow_count + 1 WHERE id = NEW.session_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_flow_indices_del AFTER DELETE ON flow_indices
+BEGIN
+    UPDATE sessions SET flow_count = flow_count - 1 WHERE id = OLD.session_id;
+END;
+
+-- Session size totals, maintained the same way so stats never scan flow_indices
+CREATE TRIGGER IF NOT EXISTS trg_flow_size_ins AFTER INSERT ON flow_indices
+BEGIN
+    UPDATE sessions SET total_size = total_size + COALESCE(NEW.size, 0) WHERE id = NEW.session_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_flow_size_del AFTER DELETE ON flow_indices
+BEGIN
+    UPDATE sessions SET total_size = total_size - COALESCE(OLD.size, 0) WHERE id = OLD.session_id;
+END;
 """
@@ -75,22 +75,6 @@ def create_session(
     return session_id
 
 
-def update_session_flow_count(db, session_id: str) -> None:
-    """Update flow_count for a session."""
-    with db._lock:
-        conn = db._get_conn()
-        conn.execute(
-            """
-            UPDATE sessions SET flow_count = (
-                SELECT COUNT(*) FROM flow_indices WHERE session_id = ?
-            )
-            WHERE id = ?
-            """,
-            (session_id, session_id),
-        )
-        conn.commit()
-
-
 def update_session_metadata(db, session_id: str, updates: Dict[str, Any]) -> bool:
     """Merge metadata updates for a session."""
     with db._lock:
@@ -4,7 +4,14 @@ from typing import Any, Dict, List, Tuple
 from urllib.parse import urlparse
 
 
+# Shared read-only stand-in for missing sub-objects; never mutate or store it
+_EMPTY: Dict[str, Any] = {}
+
+
 def safe_decode(value: Any) -> str:
+    # Exact str check first: query/cookie fields are str, header fields bytes
+    if type(value) is str:
+        return value
     if isinstance(value, bytes):
         try:
             return value.decode("utf-8")
@@ -13,42 +20,87 @@ def safe_decode(value: Any) -> str:
     return str(value)
 
 
+def _fields_to_har(fields: Any) -> List[Dict[str, str]]:
+    # Shared kernel for the three converters below; runs for every header,
+    # cookie and query pair of every captured flow.
+    decode = safe_decode
+    return [{"name": decode(name), "value": decode(value)} for name, value in fields]
+
+
 def headers_to_har(headers: Any) -> List[Dict[str, str]]:
-    result = []
-    for name, value in headers.fields:
-        result.append({"name": safe_decode(name), "value": safe_decode(value)})
-    return result
+    return _fields_to_har(headers.fields)
 
 
 def cookies_to_har(cookies: Any) -> List[Dict[str, Any]]:
-    result = []
-    for name, value in cookies.fields:
-        result.append({"name": safe_decode(name), "value": safe_decode(value)})
-    return result
+    return _fields_to_har(cookies.fields)
 
 
 def query_to_har(query: Any) -> List[Dict[str, str]]:
-    result = []
-    for name, value in query.fields:
-        result.append({"name": safe_decode(name), "value": safe_decode(value)})
-    return result
-
-
-def normalize_har_entries(entries: list) -> Tuple[list, list]:
+    return _fields_to_har(query.fields)
+
+
+def _hit_summary(hit: Any) -> Dict[str, Any]:
+    hit = hit or _EMPTY
+    return {
+        "id": hit.get("id") or "",
+        "name": hit.get("name") or "",
+        "type": hit.get("type") or "",
+        "status": hit.get("status"),
+    }
+
+
+def build_index_record(flow: Dict[str, Any]) -> Dict[str, Any]:
+    """Lightweight list-view index for an imported flow (session or HAR)."""
+    rc = flow.get("_rc") or _EMPTY
+    req = flow.get("request") or _EMPTY
+    resp = flow.get("response") or _EMPTY
+    content = resp.get("content") or _EMPTY
+    parsed_url = req.get("_parsedUrl") or _EMPTY
+    return {
+        "id": flow.get("id"),
+        "msg_ts": flow.get("msg_ts", 0),
+        "method": req.get("method") or "",
+        "url": req.get("url") or "",
+        "host": parsed_url.get("host") or flow.get("host") or "",
+        "path": parsed_url.get("path") or flow.get("path") or "",
+        "status": resp.get("status") or 0,
+        "contentType": content.get("mimeType", "") or flow.get("contentType") or "",
+        "startedDateTime": flow.get("startedDateTime") or "",
+        "time": flow.get("time") or 0,
+        "size": content.get("size", 0) or flow.get("size") or 0,
+        "clientIp": rc.get("clientIp") or "",
+        "appName": rc.get("appName") or "",
+        "appDisplayName": rc.get("appDisplayName") or "",
+        "hasError": bool(rc.get("error")),
+        "hasRequestBody": bool((req.get("postData") or _EMPTY).get("text")),
+        "hasResponseBody": bool(content.get("text")),
+        "isWebsocket": bool(rc.get("isWebsocket")),
+        "isSse": bool(rc.get("isSse")),
+        "websocketFrameCount": rc.get("websocketFrameCount") or 0,
+        "isIntercepted": bool((rc.get("intercept") or _EMPTY).get("intercepted")),
+        "hits": [_hit_summary(h) for h in (rc.get("hits") or [])],
+    }
+
+
+def normalize_har_entries(entries: list, with_indices: bool = True) -> Tuple[list, list]:
     flows = []
     indices = []
     base_ts = time.time()
+    # Loop-invariant lookups bound once; HAR imports run this per entry
+    append_flow = flows.append
+    append_index = indices.append
+    uuid4 = uuid.uuid4
 
     for idx, entry in enumerate(entries):
         if not entry:
             continue
 
-        flow_id = str(uuid.uuid4())
+        flow_id = str(uuid4())
         req = entry.get("request") or {}
         url = req.get("url") or ""
         parsed = urlparse(url) if url else None
         resp = entry.get("response") or {}
-        resp_content = resp.get("content") or {}
+        resp_content = resp.get("content") or _EMPTY
         rc = entry.get("_rc") or {}
 
         msg_ts = base_ts + idx * 0.001
@@ -66,38 +118,9 @@ def normalize_har_entries(entries: list) -> Tuple[list, list]:
             "size": resp_content.get("size") or 0,
             "_rc": rc,
         }
-        flows.append(flow_data)
-
-        indices.append(
-            {
-                "id": flow_id,
-                "msg_ts": msg_ts,
-                "method": req.get("method") or "",
-                "url": url,
-                "host": flow_data["host"],
-                "path": flow_data["path"],
-                "status": resp.get("status") or 0,
-                "contentType": flow_data["contentType"],
-                "startedDateTime": flow_data["startedDateTime"],
-                "time": flow_data["time"],
-                "size": flow_data["size"],
-                "hasError": bool(rc.get("error")),
-                "hasRequestBody": bool((req.get("postData") or {}).get("text")),
-                "hasResponseBody": bool(resp_content.get("text")),
-                "isWebsocket": bool(rc.get("isWebsocket")),
-                "isSse": bool(rc.get("isSse")),
-                "websocketFrameCount": rc.get("websocketFrameCount") or 0,
-                "isIntercepted": bool((rc.get("intercept") or {}).get("intercepted")),
-                "hits": [
-                    {
-                        "id": (h or {}).get("id") or "",
-                        "name": (h or {}).get("name") or "",
-                        "type": (h or {}).get("type") or "",
-                        "status": (h or {}).get("status"),
-                    }
-                    for h in (rc.get("hits") or [])
-                ],
-            }
-        )
+        append_flow(flow_data)
+
+        if with_indices:
+            append_index(build_index_record(flow_data))
 
     return flows, indices
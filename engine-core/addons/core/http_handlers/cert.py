@@ -1,52 +1,78 @@
-from typing import Any
+import os
+import string
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 from mitmproxy import ctx
 
 from ..i18n_cert import build_cert_template_vars
 from .errors import CORS_HEADERS
 
+_PEM_HEADERS = {
+    "Content-Type": "application/x-pem-file",
+    "Content-Disposition": 'attachment; filename="relaycraft-ca-cert.pem"',
+    "Access-Control-Allow-Origin": "*",
+}
+_CRT_HEADERS = {
+    "Content-Type": "application/x-x509-ca-cert",
+    "Content-Disposition": 'attachment; filename="relaycraft-ca-cert.crt"',
+    "Access-Control-Allow-Origin": "*",
+}
+_HTML_HEADERS = {"Content-Type": "text/html; charset=utf-8", "Access-Control-Allow-Origin": "*"}
+
+# path -> ((mtime_ns, size), bytes). The CA can be regenerated while the
+# engine runs, so entries are revalidated with one stat() per request.
+_cert_file_cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+
+
+def _read_cert_file(path: Optional[str]) -> Optional[bytes]:
+    """Contents of a certificate file, or None if it does not exist."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _cert_file_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "rb") as file_handle:
+        content = file_handle.read()
+    _cert_file_cache[path] = (key, content)
+    return content
 
-def _handle_cert_serve(monitor: Any, flow: Any, Response: Any) -> None:
-    import os
 
+@lru_cache(maxsize=1)
+def _landing_template() -> string.Template:
+    """The setup-guide page template shipped with the engine (read once)."""
+    assets_dir = os.path.join(os.path.dirname(__file__), "..", "assets")
+    template_path = os.path.join(os.path.abspath(assets_dir), "cert_landing.html")
+    with open(template_path, "r", encoding="utf-8") as file_handle:
+        return string.Template(file_handle.read())
+
+
+def _handle_cert_serve(monitor: Any, flow: Any, Response: Any) -> None:
     confdir = os.environ.get("MITMPROXY_CONFDIR")
     cert_path_pem = os.path.join(confdir, "relaycraft-ca-cert.pem") if confdir else None
     cert_path_crt = os.path.join(confdir, "relaycraft-ca-cert.crt") if confdir else None
 
-    path = flow.request.path.split("?")[0]
+    path = flow.request.path.partition("?")[0]
 
     if path in ("/cert", "/cert.pem"):
-        if cert_path_pem and os.path.exists(cert_path_pem):
-            with open(cert_path_pem, "rb") as file_handle:
-                content = file_handle.read()
-            flow.response = Response.make(
-                200,
-                content,
-                {
-                    "Content-Type": "application/x-pem-file",
-                    "Content-Disposition": 'attachment; filename="relaycraft-ca-cert.pem"',
-                    "Access-Control-Allow-Origin": "*",
-                },
-            )
+        content = _read_cert_file(cert_path_pem)
+        if content is not None:
+            flow.response = Response.make(200, content, _PEM_HEADERS)
         else:
             flow.response = Response.make(404, b"Certificate not found", CORS_HEADERS)
         return
 
     if path == "/cert.crt":
-        target = cert_path_crt if (cert_path_crt and os.path.exists(cert_path_crt)) else cert_path_pem
-        file_name = "relaycraft-ca-cert.crt"
-        if target and os.path.exists(target):
-            with open(target, "rb") as file_handle:
-                content = file_handle.read()
-            flow.response = Response.make(
-                200,
-                content,
-                {
-                    "Content-Type": "application/x-x509-ca-cert",
-                    "Content-Disposition": f'attachment; filename="{file_name}"',
-                    "Access-Control-Allow-Origin": "*",
-                },
-            )
+        content = _read_cert_file(cert_path_crt)
+        if content is None:
+            content = _read_cert_file(cert_path_pem)
+        if content is not None:
+            flow.response = Response.make(200, content, _CRT_HEADERS)
         else:
             flow.response = Response.make(404, b"Certificate not found", CORS_HEADERS)
         return
@@ -72,13 +98,7 @@ def _handle_cert_serve(monitor: Any, flow: Any, Response: Any) -> None:
 
     # Non-fatal: fallback to hardcoded HTML if template loading fails
     try:
-        import string
-
-        assets_dir = os.path.join(os.path.dirname(__file__), "..", "assets")
-        template_path = os.path.join(os.path.abspath(assets_dir), "cert_landing.html")
-        with open(template_path, "r", encoding="utf-8") as file_handle:
-            template_str = file_handle.read()
-        html_content = string.Template(template_str).safe_substitute(template_vars)
+        html_content = _landing_template().safe_substitute(template_vars)
     except Exception as template_err:
         monitor.logger.error(f"Template loading error: {template_err}")
         html_content = "<h1>RelayCraft</h1><p>Setup Guide (Template Error)</p><p><a href='/cert'>Download Certificate</a></p>"
@@ -86,5 +106,5 @@ def _handle_cert_serve(monitor: Any, flow: Any, Response: Any) -> None:
     flow.response = Response.make(
         200,
         html_content.encode("utf-8"),
-        {"Content-Type": "text/html; charset=utf-8", "Access-Control-Allow-Origin": "*"},
+        _HTML_HEADERS,
     )
@@ -24,8 +24,7 @@ def _handle_breakpoints(monitor: Any, flow: Any, Response: Any) -> None:
     elif action == "remove":
         monitor.debug_mgr.remove_breakpoint(data.get("id") or data.get("pattern"))
     elif action == "clear":
-        with monitor.debug_mgr.lock:
-            monitor.debug_mgr.breakpoints = []
+        monitor.debug_mgr.clear_breakpoints()
     elif action == "list":
         with monitor.debug_mgr.lock:
             bp_list = monitor.debug_mgr.breakpoints
@@ -50,6 +49,8 @@ def _handle_resume(monitor: Any, flow: Any, Response: Any) -> None:
 
 
 def _handle_sessions_delete_all(monitor: Any, flow: Any, Response: Any) -> None:
+    # Captures still queued for the writer would land after the delete
+    monitor.flush_stores()
     count = delete_all_historical_sessions(monitor.db)
     json_str = json.dumps({"success": True, "count": count}, ensure_ascii=False)
     flow.response = Response.make(200, json_str.encode("utf-8"), JSON_HEADERS)
@@ -92,6 +93,7 @@ def _handle_session_activate(monitor: Any, flow: Any, Response: Any) -> None:
 def _handle_session_delete(monitor: Any, flow: Any, Response: Any) -> None:
     data = json.loads(flow.request.content.decode("utf-8"))
     session_id = data.get("id")
+    monitor.flush_stores()
     success = delete_session(monitor.db, session_id)
     json_str = json.dumps({"success": success}, ensure_ascii=False)
     flow.response = Response.make(
@@ -104,6 +106,8 @@ def _handle_database_reset(monitor: Any, flow: Any, Response: Any) -> None:
         db = monitor.db
         from ..flowdb import get_flow_count, vacuum
         active = get_active_session(db)
+        # Captures still queued for the writer would land after the reset
+        monitor.flush_stores()
 
         # 1. Count active session flows before clearing
         cleared = get_flow_count(db, active['id']) if active else 0
@@ -133,6 +137,8 @@ def _handle_database_reset(monitor: Any, flow: Any, Response: Any) -> None:
 def _handle_session_clear(monitor: Any, flow: Any, Response: Any) -> None:
     data = json.loads(flow.request.content.decode("utf-8")) if flow.request.content else {}
     session_id = data.get("id")
+    # Captures still queued for the writer would land after the clear
+    monitor.flush_stores()
 
     if session_id:
         active = get_active_session(monitor.db)
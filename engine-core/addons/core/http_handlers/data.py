@@ -2,8 +2,10 @@ import json
 from typing import Any, Callable
 
 from ..flowdb import (
+    HAR_ENVELOPE_PREFIX,
+    HAR_ENVELOPE_SUFFIX,
     export_to_file_iter,
-    get_all_flows,
+    iter_all_flows,
     get_flow_count,
     get_stats,
     search_by_body,
@@ -11,6 +13,11 @@ from ..flowdb import (
     search_by_url,
 )
 from .errors import CORS_HEADERS, JSON_HEADERS
+from ..json_codec import dump_json_array, dump_json_lines
+
+_NDJSON_HEADERS = {"Content-Type": "application/x-ndjson", "Access-Control-Allow-Origin": "*"}
+_HAR_PREFIX = HAR_ENVELOPE_PREFIX.encode("utf-8")
+_HAR_SUFFIX = HAR_ENVELOPE_SUFFIX.encode("utf-8")
 
 
 def _handle_search(monitor: Any, flow: Any, Response: Any) -> None:
@@ -107,9 +114,20 @@ def _handle_export_session(
             JSON_HEADERS,
         )
     else:
-        all_flows = get_all_flows(monitor.db, session_id=session_id)
-        json_str = json.dumps(all_flows, default=safe_json_default, ensure_ascii=False)
-        flow.response = Response.make(200, json_str.encode("utf-8"), JSON_HEADERS)
+        flows = iter_all_flows(monitor.db, session_id=session_id)
+        flow.response = Response.make(200, dump_json_array(flows, safe_json_default), JSON_HEADERS)
+
+
+def _handle_export_session_ndjson(
+    monitor: Any,
+    flow: Any,
+    Response: Any,
+    safe_json_default: Callable[[Any], str],
+) -> None:
+    """Session flows as NDJSON, so clients can parse them line by line."""
+    session_id = flow.request.query.get("session_id")
+    flows = iter_all_flows(monitor.db, session_id=session_id)
+    flow.response = Response.make(200, dump_json_lines(flows, safe_json_default), _NDJSON_HEADERS)
 
 
 def _handle_export_har(
@@ -129,16 +147,9 @@ def _handle_export_har(
             JSON_HEADERS,
         )
     else:
-        all_flows = get_all_flows(monitor.db, session_id=session_id)
-        har_data = {
-            "log": {
-                "version": "1.2",
-                "creator": {"name": "RelayCraft", "version": "1.0"},
-                "entries": all_flows,
-            }
-        }
-        json_str = json.dumps(har_data, default=safe_json_default, ensure_ascii=False)
-        flow.response = Response.make(200, json_str.encode("utf-8"), JSON_HEADERS)
+        flows = iter_all_flows(monitor.db, session_id=session_id)
+        body = dump_json_array(flows, safe_json_default, prefix=_HAR_PREFIX, suffix=_HAR_SUFFIX)
+        flow.response = Response.make(200, body, JSON_HEADERS)
 
 
 def _handle_export_progress(monitor: Any, flow: Any, Response: Any) -> None:
@@ -1,340 +1,326 @@
-import json
+import functools
+import os
+import threading
+import time
 import traceback
-from typing import Any
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Optional
 
 from ..flowdb import (
     create_session,
     store_flows_batch,
-    update_session_flow_count,
     update_session_import_status,
 )
 from ..har_converters import normalize_har_entries
+from ..json_codec import dump_json, load_json
+from .errors import CORS_HEADERS, JSON_HEADERS
+
+try:
+    import ijson
+except ImportError:  # pinned in requirements.txt; only the file importers use it
+    ijson = None
+
+# Rows per store_flows_batch() call in the background file importers.
+_IMPORT_BATCH_SIZE = 500
+# /_relay is reachable through the proxy, so failures do not echo exception
+# text back; the full traceback goes to the engine log instead.
+_IMPORT_ERROR_BODY = b"Internal Server Error"
+
+
+def _fill_msg_ts(item: dict, fallback_ts: float) -> None:
+    """Derive a missing msg_ts from startedDateTime, else use fallback_ts."""
+    started = item.get("startedDateTime")
+    if started:
+        try:
+            item["msg_ts"] = datetime.fromisoformat(started.replace("Z", "+00:00")).timestamp()
+            return
+        except Exception:
+            pass
+    item["msg_ts"] = fallback_ts
+
+
+def _post_import_route(label: str) -> Callable[[Callable[..., None]], Callable[..., None]]:
+    """POST-only import endpoint; any failure is logged and answered with a generic 500."""
+
+    def decorate(handler: Callable[..., None]) -> Callable[..., None]:
+        @functools.wraps(handler)
+        def wrapper(monitor: Any, flow: Any, Response: Any) -> None:
+            if flow.request.method != "POST":
+                flow.response = Response.make(405, b"Method Not Allowed", CORS_HEADERS)
+                return
+            try:
+                handler(monitor, flow, Response)
+            except Exception:
+                tb = traceback.format_exc()
+                monitor.logger.error(f"Import {label} error: {tb}")
+                flow.response = Response.make(500, _IMPORT_ERROR_BODY, CORS_HEADERS)
 
+        return wrapper
 
-def _handle_import_session(monitor: Any, flow: Any, Response: Any) -> None:
-    try:
-        from datetime import datetime
-        import time
-
-        if flow.request.method == "POST":
-            data = json.loads(flow.request.content.decode("utf-8"))
-
-            if isinstance(data, list):
-                flows = data
-                session_name = f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
-                session_description = ""
-                session_metadata = {"type": "session_import"}
-                session_created_at = None
-            else:
-                flows = data.get("flows", [])
-                session_name = data.get("name") or f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
-                session_description = data.get("description") or ""
-                session_metadata = data.get("metadata") or {}
-                session_metadata["type"] = "session_import"
-                metadata_created = (session_metadata or {}).get("createdAt")
-                session_created_at = metadata_created / 1000.0 if metadata_created else None
-
-            for idx, item in enumerate(flows):
-                if not item.get("msg_ts"):
-                    if item.get("startedDateTime"):
-                        try:
-                            from datetime import datetime as dt
-
-                            dt_str = item["startedDateTime"].replace("Z", "+00:00")
-                            item["msg_ts"] = dt.fromisoformat(dt_str).timestamp()
-                        except Exception:
-                            item["msg_ts"] = time.time() + idx * 0.001
-                    else:
-                        item["msg_ts"] = time.time() + idx * 0.001
-
-            session_id = create_session(
-                monitor.db,
-                name=session_name,
-                description=session_description,
-                metadata=session_metadata,
-                is_active=False,
-                created_at=session_created_at,
-            )
-
-            store_flows_batch(monitor.db, flows, session_id=session_id)
-            update_session_flow_count(monitor.db, session_id)
-
-            indices = monitor._build_session_indices(flows)
-            json_str = json.dumps({"session_id": session_id, "indices": indices}, ensure_ascii=False)
-            flow.response = Response.make(
-                200,
-                json_str.encode("utf-8"),
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            )
-        else:
-            flow.response = Response.make(405, b"Method Not Allowed", {"Access-Control-Allow-Origin": "*"})
-    except Exception as e:
-        tb = traceback.format_exc()
-        monitor.logger.error(f"Import session error: {tb}")
-        flow.response = Response.make(500, str(e).encode("utf-8"), {"Access-Control-Allow-Origin": "*"})
+    return decorate
 
 
-def _handle_import_session_file(monitor: Any, flow: Any, Response: Any) -> None:
-    try:
-        from datetime import datetime
-        import os as _os
-
-        if flow.request.method == "POST":
-            req_data = json.loads(flow.request.content.decode("utf-8"))
-            file_path = req_data.get("path")
-            if not file_path:
-                flow.response = Response.make(
-                    400,
-                    b'{"error": "Missing path"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
+def _wants_minimal_indices(flow: Any) -> bool:
+    """``?minimal=1``: the caller only needs ids back, not list-view indices."""
+    return flow.request.query.get("minimal") == "1"
 
-            try:
-                file_path = _os.path.abspath(file_path)
-            except Exception as e:
-                monitor.logger.debug(f"Path normalization failed, using raw path: {e}")
-
-            if not file_path.lower().endswith(".relay"):
-                flow.response = Response.make(
-                    400,
-                    b'{"error": "Invalid file type. Only .relay allowed"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
 
-            if not _os.path.exists(file_path):
-                flow.response = Response.make(
-                    404,
-                    b'{"error": "File not found"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
+def _minimal_indices(flows: list) -> list:
+    return [{"id": f.get("id"), "msg_ts": f.get("msg_ts", 0)} for f in flows]
 
-            import ijson
-            import threading
-            import time
 
-            session_name = f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
-            session_description = ""
-            session_metadata = {"type": "session_import", "status": "importing"}
-            session_created_at = None
+@_post_import_route("session")
+def _handle_import_session(monitor: Any, flow: Any, Response: Any) -> None:
+    data = load_json(flow.request.content)
+
+    if isinstance(data, list):
+        flows = data
+        session_name = f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+        session_description = ""
+        session_metadata = {"type": "session_import"}
+        session_created_at = None
+    else:
+        flows = data.get("flows", [])
+        session_name = data.get("name") or f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+        session_description = data.get("description") or ""
+        session_metadata = data.get("metadata") or {}
+        session_metadata["type"] = "session_import"
+        metadata_created = (session_metadata or {}).get("createdAt")
+        session_created_at = metadata_created / 1000.0 if metadata_created else None
+
+    base_ts = time.time()
+    for idx, item in enumerate(flows):
+        if not item.get("msg_ts"):
+            _fill_msg_ts(item, base_ts + idx * 0.001)
+
+    session_id = create_session(
+        monitor.db,
+        name=session_name,
+        description=session_description,
+        metadata=session_metadata,
+        is_active=False,
+        created_at=session_created_at,
+    )
+
+    store_flows_batch(monitor.db, flows, session_id=session_id)
+
+    if _wants_minimal_indices(flow):
+        indices = _minimal_indices(flows)
+    else:
+        indices = monitor._build_session_indices(flows)
+    flow.response = Response.make(
+        200,
+        dump_json({"session_id": session_id, "indices": indices}),
+        JSON_HEADERS,
+    )
+
+
+def _resolve_import_path(monitor: Any, flow: Any, Response: Any, extension: str) -> Optional[str]:
+    """Validated absolute path from a file-import request, or None once an error response is set."""
+    req_data = load_json(flow.request.content)
+    file_path = req_data.get("path")
+    if not file_path:
+        flow.response = Response.make(
+            400,
+            b'{"error": "Missing path"}',
+            JSON_HEADERS,
+        )
+        return None
 
-            try:
-                with open(file_path, "rb") as fh:
-                    parser = ijson.parse(fh)
-                    for prefix, event, value in parser:
-                        if prefix == "name" and event == "string":
-                            session_name = value
-                        elif prefix == "description" and event == "string":
-                            session_description = value
-                        elif prefix == "flows" or event == "start_array":
-                            break
-            except Exception as e:
-                monitor.logger.warning(f"Fast metadata parse failed, using defaults: {e}")
-
-            session_id = create_session(
-                monitor.db,
-                name=session_name,
-                description=session_description,
-                metadata=session_metadata,
-                is_active=False,
-                created_at=session_created_at,
-            )
-
-            def stream_import_worker() -> None:
-                try:
-                    with open(file_path, "rb") as fh:
-                        fh.seek(0)
-                        first_char = b""
-                        while first_char in (b"", b" ", b"\t", b"\r", b"\n"):
-                            first_char = fh.read(1)
-                        fh.seek(0)
-
-                        item_path = "item" if first_char == b"[" else "flows.item"
-                        flows_stream = ijson.items(fh, item_path)
-
-                        batch = []
-                        batch_size = 500
-                        count = 0
-
-                        for item in flows_stream:
-                            if not item.get("msg_ts"):
-                                if item.get("startedDateTime"):
-                                    try:
-                                        from datetime import datetime as dt
-
-                                        dt_str = item["startedDateTime"].replace("Z", "+00:00")
-                                        item["msg_ts"] = dt.fromisoformat(dt_str).timestamp()
-                                    except Exception:
-                                        item["msg_ts"] = time.time() + count * 0.001
-                                else:
-                                    item["msg_ts"] = time.time() + count * 0.001
-
-                            batch.append(item)
-                            count += 1
-
-                            if len(batch) >= batch_size:
-                                store_flows_batch(monitor.db, batch, session_id=session_id)
-                                batch = []
-                                time.sleep(0.01)
-
-                        if batch:
-                            store_flows_batch(monitor.db, batch, session_id=session_id)
-
-                        update_session_flow_count(monitor.db, session_id)
-                        update_session_import_status(monitor.db, session_id, "ready")
-
-                except Exception as e:
-                    monitor.logger.error(f"Background stream import failed: {traceback.format_exc()}")
-                    try:
-                        update_session_import_status(monitor.db, session_id, "error", str(e))
-                    except Exception as inner_e:
-                        monitor.logger.debug(f"Failed to update session error status: {inner_e}")
-
-            t = threading.Thread(target=stream_import_worker, name=f"ImportWorker-{session_id}", daemon=True)
-            t.start()
-
-            json_str = json.dumps({"session_id": session_id, "status": "importing"}, ensure_ascii=False)
-            flow.response = Response.make(
-                200,
-                json_str.encode("utf-8"),
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            )
-        else:
-            flow.response = Response.make(405, b"Method Not Allowed", {"Access-Control-Allow-Origin": "*"})
+    try:
+        file_path = os.path.abspath(file_path)
     except Exception as e:
-        tb = traceback.format_exc()
-        monitor.logger.error(f"Import session file error: {tb}")
-        flow.response = Response.make(500, str(e).encode("utf-8"), {"Access-Control-Allow-Origin": "*"})
-
-
-def _handle_import_har(monitor: Any, flow: Any, Response: Any) -> None:
+        monitor.logger.debug(f"Path normalization failed, using raw path: {e}")
+
+    if not file_path.lower().endswith(extension):
+        flow.response = Response.make(
+            400,
+            f'{{"error": "Invalid file type. Only {extension} allowed"}}'.encode("utf-8"),
+            JSON_HEADERS,
+        )
+        return None
+
+    if not os.path.exists(file_path):
+        flow.response = Response.make(
+            404,
+            b'{"error": "File not found"}',
+            JSON_HEADERS,
+        )
+        return None
+
+    return file_path
+
+
+def _run_background_import(
+    monitor: Any,
+    session_id: str,
+    label: str,
+    stream: Callable[[Any, str, str], None],
+    file_path: str,
+) -> None:
+    """Thread body for file imports: stream rows in, then mark the session ready or failed."""
     try:
-        from datetime import datetime
+        stream(monitor, file_path, session_id)
+        update_session_import_status(monitor.db, session_id, "ready")
+    except Exception as e:
+        monitor.logger.error(f"Background {label} import failed: {traceback.format_exc()}")
+        try:
+            update_session_import_status(monitor.db, session_id, "error", str(e))
+        except Exception as inner_e:
+            monitor.logger.debug(f"Failed to update session error status: {inner_e}")
+
+
+def _start_background_import(
+    monitor: Any,
+    session_id: str,
+    label: str,
+    thread_name: str,
+    stream: Callable[[Any, str, str], None],
+    file_path: str,
+) -> None:
+    t = threading.Thread(
+        target=_run_background_import,
+        args=(monitor, session_id, label, stream, file_path),
+        name=f"{thread_name}-{session_id}",
+        daemon=True,
+    )
+    t.start()
+
+
+def _stream_session_file(monitor: Any, file_path: str, session_id: str) -> None:
+    with open(file_path, "rb") as fh:
+        fh.seek(0)
+        first_char = b""
+        while first_char in (b"", b" ", b"\t", b"\r", b"\n"):
+            first_char = fh.read(1)
+        fh.seek(0)
+
+        item_path = "item" if first_char == b"[" else "flows.item"
+        flows_stream = ijson.items(fh, item_path)
+
+        count = 0
+        base_ts = time.time()
+
+        while True:
+            batch = list(islice(flows_stream, _IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            for idx, item in enumerate(batch, count):
+                if not item.get("msg_ts"):
+                    _fill_msg_ts(item, base_ts + idx * 0.001)
+            count += len(batch)
+
+            store_flows_batch(monitor.db, batch, session_id=session_id)
+            if len(batch) < _IMPORT_BATCH_SIZE:
+                break
+            time.sleep(0.01)
 
-        if flow.request.method == "POST":
-            har_data = json.loads(flow.request.content.decode("utf-8"))
-            entries = har_data.get("log", {}).get("entries", []) or []
 
-            session_id = create_session(
-                monitor.db,
-                name=f"Imported HAR ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
-                description="",
-                metadata={"type": "har_import"},
-                is_active=False,
-            )
+def _stream_har_file(monitor: Any, file_path: str, session_id: str) -> None:
+    with open(file_path, "rb") as fh:
+        entries_stream = ijson.items(fh, "log.entries.item")
 
-            flows, indices = normalize_har_entries(entries)
+        while True:
+            batch = list(islice(entries_stream, _IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            flows, _ = normalize_har_entries(batch, with_indices=False)
             store_flows_batch(monitor.db, flows, session_id=session_id)
-            update_session_flow_count(monitor.db, session_id)
-
-            json_str = json.dumps({"session_id": session_id, "indices": indices}, ensure_ascii=False)
-            flow.response = Response.make(
-                200,
-                json_str.encode("utf-8"),
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            )
-        else:
-            flow.response = Response.make(405, b"Method Not Allowed", {"Access-Control-Allow-Origin": "*"})
-    except Exception as e:
-        tb = traceback.format_exc()
-        monitor.logger.error(f"Import HAR error: {tb}")
-        flow.response = Response.make(500, str(e).encode("utf-8"), {"Access-Control-Allow-Origin": "*"})
+            if len(batch) < _IMPORT_BATCH_SIZE:
+                break
+            time.sleep(0.01)
 
 
-def _handle_import_har_file(monitor: Any, flow: Any, Response: Any) -> None:
-    try:
-        from datetime import datetime
-        import os as _os
-        import threading
-
-        if flow.request.method == "POST":
-            req_data = json.loads(flow.request.content.decode("utf-8"))
-            file_path = req_data.get("path")
-            if not file_path:
-                flow.response = Response.make(
-                    400,
-                    b'{"error": "Missing path"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
+def _importing_response(Response: Any, session_id: str) -> Any:
+    return Response.make(
+        200,
+        dump_json({"session_id": session_id, "status": "importing"}),
+        JSON_HEADERS,
+    )
 
-            try:
-                file_path = _os.path.abspath(file_path)
-            except Exception as e:
-                monitor.logger.debug(f"Path normalization failed, using raw path: {e}")
-
-            if not file_path.lower().endswith(".har"):
-                flow.response = Response.make(
-                    400,
-                    b'{"error": "Invalid file type. Only .har allowed"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
 
-            if not _os.path.exists(file_path):
-                flow.response = Response.make(
-                    404,
-                    b'{"error": "File not found"}',
-                    {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-                )
-                return
+@_post_import_route("session file")
+def _handle_import_session_file(monitor: Any, flow: Any, Response: Any) -> None:
+    file_path = _resolve_import_path(monitor, flow, Response, ".relay")
+    if file_path is None:
+        return
+
+    session_name = f"Imported Session ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+    session_description = ""
+    session_metadata = {"type": "session_import", "status": "importing"}
+    session_created_at = None
 
-            session_id = create_session(
-                monitor.db,
-                name=f"Imported HAR ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
-                description="",
-                metadata={"type": "har_import", "status": "importing"},
-                is_active=False,
-            )
-
-            def stream_har_worker() -> None:
-                try:
-                    import ijson
-                    import time
-
-                    with open(file_path, "rb") as fh:
-                        entries_stream = ijson.items(fh, "log.entries.item")
-
-                        batch = []
-                        batch_size = 500
-
-                        for entry in entries_stream:
-                            batch.append(entry)
-
-                            if len(batch) >= batch_size:
-                                flows, _ = normalize_har_entries(batch)
-                                store_flows_batch(monitor.db, flows, session_id=session_id)
-                                batch = []
-                                time.sleep(0.01)
-
-                        if batch:
-                            flows, _ = normalize_har_entries(batch)
-                            store_flows_batch(monitor.db, flows, session_id=session_id)
-
-                        update_session_flow_count(monitor.db, session_id)
-                        update_session_import_status(monitor.db, session_id, "ready")
-
-                except Exception as e:
-                    monitor.logger.error(f"Background HAR stream import failed: {traceback.format_exc()}")
-                    try:
-                        update_session_import_status(monitor.db, session_id, "error", str(e))
-                    except Exception as inner_e:
-                        monitor.logger.debug(f"Failed to update session error status: {inner_e}")
-
-            t = threading.Thread(target=stream_har_worker, name=f"ImportHARWorker-{session_id}", daemon=True)
-            t.start()
-
-            json_str = json.dumps({"session_id": session_id, "status": "importing"}, ensure_ascii=False)
-            flow.response = Response.make(
-                200,
-                json_str.encode("utf-8"),
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            )
-        else:
-            flow.response = Response.make(405, b"Method Not Allowed", {"Access-Control-Allow-Origin": "*"})
+    try:
+        with open(file_path, "rb") as fh:
+            parser = ijson.parse(fh)
+            for prefix, event, value in parser:
+                if prefix == "name" and event == "string":
+                    session_name = value
+                elif prefix == "description" and event == "string":
+                    session_description = value
+                elif prefix == "flows" or event == "start_array":
+                    break
     except Exception as e:
-        tb = traceback.format_exc()
-        monitor.logger.error(f"Import HAR file error: {tb}")
-        flow.response = Response.make(500, str(e).encode("utf-8"), {"Access-Control-Allow-Origin": "*"})
+        monitor.logger.warning(f"Fast metadata parse failed, using defaults: {e}")
+
+    session_id = create_session(
+        monitor.db,
+        name=session_name,
+        description=session_description,
+        metadata=session_metadata,
+        is_active=False,
+        created_at=session_created_at,
+    )
+
+    _start_background_import(
+        monitor, session_id, "stream", "ImportWorker", _stream_session_file, file_path
+    )
+    flow.response = _importing_response(Response, session_id)
+
+
+@_post_import_route("HAR")
+def _handle_import_har(monitor: Any, flow: Any, Response: Any) -> None:
+    har_data = load_json(flow.request.content)
+    entries = har_data.get("log", {}).get("entries", []) or []
+
+    session_id = create_session(
+        monitor.db,
+        name=f"Imported HAR ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+        description="",
+        metadata={"type": "har_import"},
+        is_active=False,
+    )
+
+    if _wants_minimal_indices(flow):
+        flows, _ = normalize_har_entries(entries, with_indices=False)
+        indices = _minimal_indices(flows)
+    else:
+        flows, indices = normalize_har_entries(entries)
+    store_flows_batch(monitor.db, flows, session_id=session_id)
+
+    flow.response = Response.make(
+        200,
+        dump_json({"session_id": session_id, "indices": indices}),
+        JSON_HEADERS,
+    )
+
+
+@_post_import_route("HAR file")
+def _handle_import_har_file(monitor: Any, flow: Any, Response: Any) -> None:
+    file_path = _resolve_import_path(monitor, flow, Response, ".har")
+    if file_path is None:
+        return
+
+    session_id = create_session(
+        monitor.db,
+        name=f"Imported HAR ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+        description="",
+        metadata={"type": "har_import", "status": "importing"},
+        is_active=False,
+    )
+
+    _start_background_import(
+        monitor, session_id, "HAR stream", "ImportHARWorker", _stream_har_file, file_path
+    )
+    flow.response = _importing_response(Response, session_id)
@@ -1,10 +1,10 @@
 import json
 from typing import Any, Callable
 
-from ..flowdb import get_detail, get_indices
+from ..flowdb import get_detail, get_poll_indices
 from .. import sse_processor
-from .errors import make_error_response
-
+from .errors import JSON_HEADERS, make_error_response
+from ..json_codec import dump_json
 
 def _handle_poll(monitor: Any, flow: Any, Response: Any, safe_json_default: Callable[[Any], str]) -> None:
     try:
@@ -21,52 +21,20 @@ def _handle_poll(monitor: Any, flow: Any, Response: Any, safe_json_default: Call
         limit_val = int(limit_param) if limit_param and int(limit_param) > 0 else 10000
 
         session_id_param = query.get("session_id", None)
-        db_indices = get_indices(monitor.db, session_id=session_id_param, since=since_ts, limit=limit_val)
-
-        indices = []
-        for idx in db_indices:
-            indices.append(
-                {
-                    "id": idx.get("id"),
-                    "method": idx.get("method", ""),
-                    "url": idx.get("url", ""),
-                    "host": idx.get("host", ""),
-                    "path": idx.get("path", ""),
-                    "status": idx.get("status", 0),
-                    "httpVersion": idx.get("http_version", ""),
-                    "contentType": idx.get("content_type", ""),
-                    "startedDateTime": idx.get("started_datetime", ""),
-                    "time": idx.get("time", 0),
-                    "size": idx.get("size", 0),
-                    "clientIp": idx.get("client_ip", ""),
-                    "appName": idx.get("app_name", ""),
-                    "appDisplayName": idx.get("app_display_name", ""),
-                    "hasError": bool(idx.get("has_error")),
-                    "hasRequestBody": bool(idx.get("has_request_body")),
-                    "hasResponseBody": bool(idx.get("has_response_body")),
-                    "isWebsocket": bool(idx.get("is_websocket")),
-                    "isSse": bool(idx.get("is_sse")),
-                    "websocketFrameCount": idx.get("websocket_frame_count", 0),
-                    "isIntercepted": bool(idx.get("is_intercepted")),
-                    "hits": idx.get("hits", []),
-                    "msg_ts": idx.get("msg_ts"),
-                }
-            )
+        indices = get_poll_indices(monitor.db, session_id=session_id_param, since=since_ts, limit=limit_val)
 
-        max_msg_ts = 0
-        if indices:
-            max_msg_ts = max(idx.get("msg_ts", 0) for idx in indices)
+        # Rows come back ordered by msg_ts, so the newest is last
+        max_msg_ts = (indices[-1].get("msg_ts") or 0) if indices else 0
 
         response_data = {
             "indices": indices,
             "server_ts": max_msg_ts if max_msg_ts > 0 else since_ts,
             "notifications": monitor.db.drain_notifications(),
         }
-        json_str = json.dumps(response_data, default=safe_json_default, ensure_ascii=False)
         flow.response = Response.make(
             200,
-            json_str.encode("utf-8"),
-            {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+            dump_json(response_data, safe_json_default),
+            JSON_HEADERS,
         )
         flow.response.status_code = 200
         flow.response.reason = b"OK"
@@ -84,7 +52,7 @@ def _handle_detail(monitor: Any, flow: Any, Response: Any, safe_json_default: Ca
             flow.response = Response.make(
                 400,
                 b'{"error": "Missing flow id"}',
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+                JSON_HEADERS,
             )
             return
 
@@ -93,15 +61,14 @@ def _handle_detail(monitor: Any, flow: Any, Response: Any, safe_json_default: Ca
             flow.response = Response.make(
                 404,
                 b'{"error": "Flow not found"}',
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+                JSON_HEADERS,
             )
             return
 
-        json_str = json.dumps(flow_data, default=safe_json_default, ensure_ascii=False)
         flow.response = Response.make(
             200,
-            json_str.encode("utf-8"),
-            {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+            dump_json(flow_data, safe_json_default),
+            JSON_HEADERS,
         )
 
     except Exception as e:
@@ -116,7 +83,7 @@ def _handle_sse(monitor: Any, flow: Any, Response: Any, safe_json_default: Calla
             flow.response = Response.make(
                 400,
                 b'{"error": "Missing flow_id"}',
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+                JSON_HEADERS,
             )
             return
 
@@ -131,11 +98,10 @@ def _handle_sse(monitor: Any, flow: Any, Response: Any, safe_json_default: Calla
             limit = monitor._sse_default_limit
 
         payload = sse_processor.get_sse_events(monitor, flow_id, since_seq=since_seq, limit=limit)
-        json_str = json.dumps(payload, default=safe_json_default, ensure_ascii=False)
         flow.response = Response.make(
             200,
-            json_str.encode("utf-8"),
-            {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+            dump_json(payload, safe_json_default),
+            JSON_HEADERS,
         )
     except Exception as e:
         flow.response = make_error_response(Response, e, monitor, "sse", safe_json_default)
@@ -147,7 +113,7 @@ def _handle_ws_inject(monitor: Any, flow: Any, Response: Any) -> None:
             flow.response = Response.make(
                 405,
                 b'{"ok": false, "code": "invalid_payload", "message": "POST required"}',
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+                JSON_HEADERS,
             )
             return
 
@@ -162,7 +128,7 @@ def _handle_ws_inject(monitor: Any, flow: Any, Response: Any) -> None:
             flow.response = Response.make(
                 400,
                 body.encode("utf-8"),
-                {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+                JSON_HEADERS,
             )
             return
 
@@ -176,7 +142,7 @@ def _handle_ws_inject(monitor: Any, flow: Any, Response: Any) -> None:
         flow.response = Response.make(
             status,
             body_json.encode("utf-8"),
-            {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
+            JSON_HEADERS,
         )
     except Exception as e:
         flow.response = make_error_response(
@@ -19,6 +19,7 @@ from .data import (
     _handle_export_har,
     _handle_export_progress,
     _handle_export_session,
+    _handle_export_session_ndjson,
     _handle_search,
     _handle_stats,
     _handle_traffic_active,
@@ -33,12 +34,69 @@ from .importers import (
 from .realtime import _handle_detail, _handle_poll, _handle_sse, _handle_ws_inject
 
 
-def _dispatch(route_map: dict, route_key: str, monitor: Any, flow: Any, Response: Any) -> bool:
-    handler = route_map.get(route_key)
-    if not handler:
+# route_key -> (handler, takes safe_json_default). Built once at import:
+# handlers are plain functions of (monitor, flow, Response[, default]).
+_REALTIME_ROUTES = {
+    "relay_poll": (_handle_poll, True),
+    "relay_detail": (_handle_detail, True),
+    "relay_sse": (_handle_sse, True),
+    "relay_ws_inject": (_handle_ws_inject, False),
+}
+
+_CONTROL_ROUTES = {
+    "relay_breakpoints": (_handle_breakpoints, False),
+    "relay_database_reset": (_handle_database_reset, False),
+    "relay_resume": (_handle_resume, False),
+    "relay_sessions_delete_all": (_handle_sessions_delete_all, False),
+    "relay_sessions_get": (_handle_sessions_get, False),
+    "relay_sessions_post": (_handle_sessions_post, False),
+    "relay_session_new": (_handle_session_new, False),
+    "relay_session_activate": (_handle_session_activate, False),
+    "relay_session_delete": (_handle_session_delete, False),
+    "relay_session_clear": (_handle_session_clear, False),
+    "relay_scripts_load_status": (_handle_scripts_load_status, False),
+    "relay_connectivity": (_handle_connectivity, False),
+}
+
+_DATA_ROUTES = {
+    "relay_search": (_handle_search, False),
+    "relay_stats": (_handle_stats, False),
+    "relay_traffic_active": (_handle_traffic_active, False),
+    "relay_export_session": (_handle_export_session, True),
+    "relay_export_session_ndjson": (_handle_export_session_ndjson, True),
+    "relay_export_har": (_handle_export_har, True),
+    "relay_export_progress": (_handle_export_progress, False),
+}
+
+_IMPORT_ROUTES = {
+    "relay_import_session": (_handle_import_session, False),
+    "relay_import_session_file": (_handle_import_session_file, False),
+    "relay_import_har": (_handle_import_har, False),
+    "relay_import_har_file": (_handle_import_har_file, False),
+}
+
+_CERT_ROUTES = {
+    "cert_serve": (_handle_cert_serve, False),
+}
+
+
+def _dispatch(
+    route_map: dict,
+    route_key: str,
+    monitor: Any,
+    flow: Any,
+    Response: Any,
+    safe_json_default: Callable[[Any], str] = None,
+) -> bool:
+    route = route_map.get(route_key)
+    if route is None:
         return False
+    handler, takes_default = route
     try:
-        handler()
+        if takes_default:
+            handler(monitor, flow, Response, safe_json_default)
+        else:
+            handler(monitor, flow, Response)
     except Exception as e:
         monitor.logger.error(f"{route_key} failed: {e}")
         flow.response = make_error_response(Response, e)
@@ -52,31 +110,11 @@ def handle_realtime_routes(
     Response: Any,
     safe_json_default: Callable[[Any], str],
 ) -> bool:
-    route_map = {
-        "relay_poll": lambda: _handle_poll(monitor, flow, Response, safe_json_default),
-        "relay_detail": lambda: _handle_detail(monitor, flow, Response, safe_json_default),
-        "relay_sse": lambda: _handle_sse(monitor, flow, Response, safe_json_default),
-        "relay_ws_inject": lambda: _handle_ws_inject(monitor, flow, Response),
-    }
-    return _dispatch(route_map, route_key, monitor, flow, Response)
+    return _dispatch(_REALTIME_ROUTES, route_key, monitor, flow, Response, safe_json_default)
 
 
 def handle_control_routes(monitor: Any, flow: Any, route_key: str, Response: Any) -> bool:
-    route_map = {
-        "relay_breakpoints": lambda: _handle_breakpoints(monitor, flow, Response),
-        "relay_database_reset": lambda: _handle_database_reset(monitor, flow, Response),
-        "relay_resume": lambda: _handle_resume(monitor, flow, Response),
-        "relay_sessions_delete_all": lambda: _handle_sessions_delete_all(monitor, flow, Response),
-        "relay_sessions_get": lambda: _handle_sessions_get(monitor, flow, Response),
-        "relay_sessions_post": lambda: _handle_sessions_post(monitor, flow, Response),
-        "relay_session_new": lambda: _handle_session_new(monitor, flow, Response),
-        "relay_session_activate": lambda: _handle_session_activate(monitor, flow, Response),
-        "relay_session_delete": lambda: _handle_session_delete(monitor, flow, Response),
-        "relay_session_clear": lambda: _handle_session_clear(monitor, flow, Response),
-        "relay_scripts_load_status": lambda: _handle_scripts_load_status(monitor, flow, Response),
-        "relay_connectivity": lambda: _handle_connectivity(monitor, flow, Response),
-    }
-    return _dispatch(route_map, route_key, monitor, flow, Response)
+    return _dispatch(_CONTROL_ROUTES, route_key, monitor, flow, Response)
 
 
 def handle_data_routes(
@@ -86,29 +124,12 @@ def handle_data_routes(
     Response: Any,
     safe_json_default: Callable[[Any], str],
 ) -> bool:
-    route_map = {
-        "relay_search": lambda: _handle_search(monitor, flow, Response),
-        "relay_stats": lambda: _handle_stats(monitor, flow, Response),
-        "relay_traffic_active": lambda: _handle_traffic_active(monitor, flow, Response),
-        "relay_export_session": lambda: _handle_export_session(monitor, flow, Response, safe_json_default),
-        "relay_export_har": lambda: _handle_export_har(monitor, flow, Response, safe_json_default),
-        "relay_export_progress": lambda: _handle_export_progress(monitor, flow, Response),
-    }
-    return _dispatch(route_map, route_key, monitor, flow, Response)
+    return _dispatch(_DATA_ROUTES, route_key, monitor, flow, Response, safe_json_default)
 
 
 def handle_import_routes(monitor: Any, flow: Any, route_key: str, Response: Any) -> bool:
-    route_map = {
-        "relay_import_session": lambda: _handle_import_session(monitor, flow, Response),
-        "relay_import_session_file": lambda: _handle_import_session_file(monitor, flow, Response),
-        "relay_import_har": lambda: _handle_import_har(monitor, flow, Response),
-        "relay_import_har_file": lambda: _handle_import_har_file(monitor, flow, Response),
-    }
-    return _dispatch(route_map, route_key, monitor, flow, Response)
+    return _dispatch(_IMPORT_ROUTES, route_key, monitor, flow, Response)
 
 
 def handle_cert_routes(monitor: Any, flow: Any, route_key: str, Response: Any) -> bool:
-    route_map = {
-        "cert_serve": lambda: _handle_cert_serve(monitor, flow, Response),
-    }
-    return _dispatch(route_map, route_key, monitor, flow, Response)
+    return _dispatch(_CERT_ROUTES, route_key, monitor, flow, Response)
@@ -0,0 +1,80 @@
+"""JSON encoding for handler payloads and stored flows, accelerated by orjson."""
+import json
+from typing import Any, Callable, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback for source checkouts without the pin
+    orjson = None
+
+
+def dump_json(data: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize a payload to UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. >64-bit ints, which json handles
+            pass
+    return json.dumps(data, default=default, ensure_ascii=False).encode("utf-8")
+
+
+def dump_json_str(data: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serialize to a JSON str; unlike dump_json this can carry lone surrogates."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, default=default, option=orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            # e.g. lone surrogates or >64-bit ints; json handles both
+            pass
+    return json.dumps(data, default=default, ensure_ascii=False)
+
+
+def dump_json_array(
+    items: Iterable[Any],
+    default: Optional[Callable[[Any], Any]] = None,
+    prefix: bytes = b"",
+    suffix: bytes = b"",
+) -> bytes:
+    """Serialize ``prefix [item, ...] suffix`` one item at a time.
+
+    Only the output buffer and the current item are alive at any point,
+    instead of a fully materialized list plus its encoded copy.
+    """
+    buf = bytearray(prefix)
+    buf += b"["
+    first = True
+    for item in items:
+        if not first:
+            buf += b","
+        first = False
+        buf += dump_json(item, default)
+    buf += b"]"
+    buf += suffix
+    return bytes(buf)
+
+
+def dump_json_lines(items: Iterable[Any], default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Serialize items as newline-delimited JSON, one item per line."""
+    buf = bytearray()
+    for item in items:
+        buf += dump_json(item, default)
+        buf += b"\n"
+    return bytes(buf)
+
+
+def load_json(raw: bytes) -> Any:
+    """Parse a UTF-8 JSON request body.
+
+    Raises json.JSONDecodeError / UnicodeDecodeError like json.loads on
+    ``raw.decode("utf-8")``.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity or >64-bit ints; let json accept them or raise
+            pass
+    return json.loads(raw.decode("utf-8"))
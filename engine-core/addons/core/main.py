@@ -1,4 +1,7 @@
+import inspect
+import logging
 import os
+import re
 import threading
 import time
 from typing import Optional, Any, List
@@ -11,6 +14,15 @@ from .proxy import ProxyManager
 from .utils import setup_logging, RelayCraftLogger
 from . import sse_processor, ws_handler
 
+_LOCAL_HOSTS = frozenset(("127.0.0.1", "localhost", "::1"))
+_CERT_PATHS = frozenset(("/cert", "/cert.pem", "/cert.crt"))
+_INTERNAL_PREFIXES = ("/_relay",)
+# CONNECT client TLS failures: "client" plus any failure token, in any order
+_CLIENT_TLS_ERROR = re.compile(
+    r"^(?=.*client)(?=.*(?:disconnect|tls|handshake|closed))", re.IGNORECASE | re.DOTALL
+)
+_DEFAULT_LISTEN_PORT = 9090
+
 # Global traffic active state (in-memory, controlled via HTTP API)
 _traffic_active_event = threading.Event()
 
@@ -29,68 +41,111 @@ def set_traffic_active(active: bool) -> None:
 
 
 class CoreAddon:
+    __slots__ = (
+        "logger",
+        "rule_engine",
+        "debug_mgr",
+        "proxy_mgr",
+        "traffic_monitor",
+        "_listen_port",
+        "_handle_relay_request",
+        "_relay_request_is_coro",
+        "_wait_for_resume",
+        "_wait_for_resume_is_coro",
+    )
+
     def __init__(self):
         self.logger: RelayCraftLogger = setup_logging()
         self.rule_engine: RuleEngine = RuleEngine()
         self.debug_mgr: DebugManager = DebugManager()
         self.proxy_mgr: ProxyManager = ProxyManager()
         self.traffic_monitor: TrafficMonitor = TrafficMonitor(self.debug_mgr)
+        self._listen_port: int = _DEFAULT_LISTEN_PORT
+        # Hook targets are fixed for the addon's lifetime: resolve them and
+        # their coroutine-ness once instead of reflecting on every flow.
+        self._handle_relay_request = getattr(self.traffic_monitor, "handle_request", None)
+        self._relay_request_is_coro = inspect.iscoroutinefunction(self._handle_relay_request)
+        self._wait_for_resume = self.debug_mgr.wait_for_resume
+        self._wait_for_resume_is_coro = inspect.iscoroutinefunction(self._wait_for_resume)
 
     def load(self, loader: Any) -> None:
         """Standard mitmproxy load hook"""
         if hasattr(ctx, "master"):
             ctx.master.relaycraft_main = self
 
+    def done(self) -> None:
+        """Standard mitmproxy done hook"""
+        try:
+            self.traffic_monitor.stop_store_worker()
+        except Exception as e:
+            self.logger.error(f"Error flushing captured flows: {e}")
+
+    def configure(self, updated: Any) -> None:
+        """Standard mitmproxy configure hook"""
+        if "listen_port" in updated:
+            self._refresh_listen_port()
+
     async def running(self) -> None:
         """Called when proxy is up and running."""
-        pass
+        self._refresh_listen_port()
+
+    def _refresh_listen_port(self) -> None:
+        """Cache the proxy listen port so per-flow checks skip option lookups."""
+        try:
+            self._listen_port = ctx.options.listen_port
+        except Exception:
+            self._listen_port = _DEFAULT_LISTEN_PORT
+
+    def requestheaders(self, flow: http.HTTPFlow) -> None:
+        """Drop flows while traffic is paused before the request body is read."""
+        try:
+            if is_traffic_active() or self.is_internal_request(flow) or self._is_reverse_flow(flow):
+                return
+            flow.kill()
+        except Exception as e:
+            self.logger.debug(f"Paused-traffic check on request headers failed: {e}")
 
     async def request(self, flow: http.HTTPFlow) -> None:
 
         # 1. System / Relay Requests - Handle first and exclusively
         if self.is_internal_request(flow):
             try:
-                if hasattr(self.traffic_monitor, "handle_request"):
-                    coro = self.traffic_monitor.handle_request(flow)
-                    import inspect
-                    if inspect.iscoroutine(coro):
-                        await coro
+                if self._handle_relay_request is not None:
+                    result = self._handle_relay_request(flow)
+                    if self._relay_request_is_coro:
+                        await result
             except Exception as e:
                 self.logger.error(f"Error handling relay request: {e}")
             return
 
         # 2. Check if traffic processing is active. Reverse-mode (share entry)
         # traffic is exempt: visitors must be served even when local capture
-        # is paused.
+        # is paused. Most paused flows are already killed in requestheaders;
+        # this catches ones whose headers arrived before the pause.
         if not is_traffic_active() and not self._is_reverse_flow(flow):
             flow.kill()
             return
 
         try:
-            # Initialize script hits list if not exists
-            if not hasattr(flow, "_relaycraft_script_hits"):
-                flow._relaycraft_script_hits = []
-
             # 1. Rule Engine (Automated) - Synchronous
+            # A response set here (mock/block) is captured by response():
+            # mitmproxy still runs the response hook for it, after response
+            # rules, so storing it now would serialize the flow twice.
             self.rule_engine.handle_request(flow)
 
-            if flow.response:
-                flow_data = self.traffic_monitor.process_flow(flow)
-                if flow_data:
-                    self.traffic_monitor._store_flow(flow_data)
-
             # 2. Interception (Manual/Breakpoint) - Asynchronous
             matched_rule = self.debug_mgr.should_intercept(flow)
             if matched_rule:
+                monitor = self.traffic_monitor
+
                 def push_paused():
-                    f_data = self.traffic_monitor.process_flow(flow)
+                    f_data = monitor.process_flow(flow)
                     if f_data:
-                        self.traffic_monitor._store_flow(f_data)
+                        monitor._store_flow(f_data)
 
-                coro = self.debug_mgr.wait_for_resume(flow, "request", on_pause=push_paused, rule=matched_rule)
-                import inspect
-                if inspect.iscoroutine(coro):
-                    await coro
+                result = self._wait_for_resume(flow, "request", on_pause=push_paused, rule=matched_rule)
+                if self._wait_for_resume_is_coro:
+                    await result
         except Exception as e:
             self.logger.error(f"Critical error in CoreAddon.request: {e}")
 
@@ -98,6 +153,8 @@ class CoreAddon:
         if self.is_internal_request(flow):
             return
 
+        monitor = self.traffic_monitor
+        logger = self.logger
         try:
             # 1. Rule Engine response handling - Synchronous
             self.rule_engine.handle_response(flow)
@@ -106,41 +163,55 @@ class CoreAddon:
             matched_rule = self.debug_mgr.should_intercept(flow, "response")
             if matched_rule:
                 def push_paused_res():
-                    f_data = self.traffic_monitor.process_flow(flow)
+                    f_data = monitor.process_flow(flow)
                     if f_data:
-                        self.traffic_monitor._store_flow(f_data)
+                        monitor._store_flow(f_data)
 
-                coro = self.debug_mgr.wait_for_resume(flow, "response", on_pause=push_paused_res, rule=matched_rule)
-                import inspect
-                if inspect.iscoroutine(coro):
-                    await coro
+                result = self._wait_for_resume(flow, "response", on_pause=push_paused_res, rule=matched_rule)
+                if self._wait_for_resume_is_coro:
+                    await result
         except Exception as e:
-            self.logger.error(f"Critical error in CoreAddon.response hook processing: {e}")
+            logger.error(f"Critical error in CoreAddon.response hook processing: {e}")
 
         # 3. Baseline Capture - before anchor.py runs
         try:
-            self.traffic_monitor.handle_response(flow)
+            monitor.handle_response(flow)
         except Exception as e:
-            self.logger.error(f"Critical error capturing traffic: {e}")
+            logger.error(f"Critical error capturing traffic: {e}")
         finally:
             try:
-                sse_processor.finalize_sse_flow(self.traffic_monitor, flow, stream_open=False)
+                sse_processor.finalize_sse_flow(monitor, flow, stream_open=False)
             except Exception as e:
-                self.logger.debug(f"SSE finalize on response failed: {e}")
+                logger.debug(f"SSE finalize on response failed: {e}")
 
-        # 4. Access Logging
-        if not self.is_internal_request(flow):
-            try:
-                res_code = flow.response.status_code if flow.response else 0
-                res_len = len(flow.response.content) if flow.response and flow.response.content else 0
-                self.logger.info(f"{flow.request.method} {flow.request.url} {res_code} {res_len}b")
-            except Exception as e:
-                self.logger.debug(f"Access log write failed: {e}")
+        # 4. Access Logging (internal requests already returned above)
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        try:
+            res_code = 0
+            res_len = 0
+            resp = flow.response
+            if resp is not None:
+                res_code = resp.status_code
+                # raw_content: sizing the log line must not decompress the body
+                raw = resp.raw_content
+                res_len = len(raw) if raw else 0
+            logger.info(f"{flow.request.method} {flow.request.url} {res_code} {res_len}b")
+        except Exception as e:
+            logger.debug(f"Access log write failed: {e}")
 
     def is_internal_request(self, flow: http.HTTPFlow) -> bool:
         """Check if request is to RelayCraft internal API"""
         if not flow or not flow.request:
             return False
+        # Every hook asks again for the same flow; classify it once.
+        metadata = flow.metadata
+        internal = metadata.get("_relaycraft_internal")
+        if internal is None:
+            internal = metadata["_relaycraft_internal"] = self._classify_internal(flow)
+        return internal
+
+    def _classify_internal(self, flow: http.HTTPFlow) -> bool:
         # Reverse-mode (share entry) traffic always runs the full pipeline.
         if self._is_reverse_flow(flow):
             return False
@@ -152,14 +223,11 @@ class CoreAddon:
             if host == "relay.guide":
                 return True
 
-            if "/_relay" in path or path == "/cert" or path in ("/cert.pem", "/cert.crt"):
+            if path.startswith(_INTERNAL_PREFIXES) or path in _CERT_PATHS:
                 return True
 
-            is_localhost = host in ["127.0.0.1", "localhost", "::1"]
-            current_port = ctx.options.listen_port if (hasattr(ctx, "options") and hasattr(ctx.options, "listen_port")) else 9090
-            is_proxy_port = port == current_port
-
-            return is_localhost and is_proxy_port and ("/_relay" in path or path == "/" or path in ("/cert", "/cert.pem", "/cert.crt"))
+            # Remaining internal shape: the proxy's own root page on localhost
+            return path == "/" and port == self._listen_port and host in _LOCAL_HOSTS
         except Exception:
             return False
 
@@ -193,10 +261,8 @@ class CoreAddon:
         err_msg = str(flow.error)
 
         # Skip CONNECT client TLS failures (logged by tls_failed_client)
-        if flow.request and flow.request.method == "CONNECT":
-            err_lower = err_msg.lower()
-            if "client" in err_lower and ("disconnect" in err_lower or "tls" in err_lower or "handshake" in err_lower or "closed" in err_lower):
-                return
+        if flow.request and flow.request.method == "CONNECT" and _CLIENT_TLS_ERROR.search(err_msg):
+            return
 
         if self._is_sse_flow(flow) and sse_processor.is_client_disconnect_error(err_msg):
             try:
@@ -259,6 +325,7 @@ class CoreAddon:
             return
 
         try:
+            self.traffic_monitor.cancel_ws_capture(flow)
             flow_data = self.traffic_monitor.process_flow(flow)
             if flow_data:
                 self.traffic_monitor._store_flow(flow_data)
@@ -13,27 +13,40 @@ Features:
 @see https://w3c.github.io/web-performance/specs/HAR/Overview.html
 """
 
+import asyncio
 import time
-import base64
+import queue
 import uuid
 import threading
+import traceback
 from collections import deque
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, Tuple, List
 
 from mitmproxy import http
 
+try:
+    # SIMD-accelerated; encodes straight to str without a bytes intermediate
+    from pybase64 import b64encode_as_string
+except ImportError:  # stdlib fallback for source checkouts without the pin
+    from base64 import b64encode
+
+    def b64encode_as_string(data: bytes) -> str:
+        return b64encode(data).decode("ascii")
+
 from .debug import DebugManager
 from .utils import setup_logging
 from .flow_database import FlowDatabase
 from .har_converters import (
+    build_index_record,
     cookies_to_har,
     headers_to_har,
     normalize_har_entries,
     query_to_har,
-    safe_decode,
 )
-from .flowdb.flow_repo import store_flow as _store_flow_repo
+from .flowdb.flow_repo import store_flow_group as _store_flow_group
+from .flowdb.body_storage import get_placeholder
+from .flowdb.schema import Config
 from . import sse_processor, ws_handler
 from .import source_detector
 from .http_handlers import (
@@ -44,10 +57,86 @@ from .http_handlers import (
     handle_cert_routes,
 )
 
+# Media types whose bodies are stored base64-encoded (matched as prefixes,
+# so parameters such as "; charset=" don't matter)
+_BINARY_MIME_PREFIXES = (
+    "image/", "video/", "audio/",
+    "application/octet-stream", "application/pdf",
+    "application/zip", "application/x-protobuf",
+    "application/x-tar", "application/gzip",
+    "font/",
+)
+_BINARY_MAGIC = (b"\xff\xd8\xff", b"\x89PNG", b"GIF8")
+# (path fragment, required method or None, route key), matched in order;
+# more specific fragments precede the ones they contain.
+_RELAY_ROUTES = (
+    ("/_relay/poll", None, "relay_poll"),
+    ("/_relay/detail", None, "relay_detail"),
+    ("/_relay/sse", None, "relay_sse"),
+    ("/_relay/ws/inject", None, "relay_ws_inject"),
+    ("/_relay/breakpoints", None, "relay_breakpoints"),
+    ("/_relay/resume", None, "relay_resume"),
+    ("/_relay/database/reset", None, "relay_database_reset"),
+    ("/_relay/sessions/delete_all", None, "relay_sessions_delete_all"),
+    ("/_relay/sessions", "GET", "relay_sessions_get"),
+    ("/_relay/sessions", "POST", "relay_sessions_post"),
+    ("/_relay/session/new", "POST", "relay_session_new"),
+    ("/_relay/session/activate", None, "relay_session_activate"),
+    ("/_relay/session/delete", None, "relay_session_delete"),
+    ("/_relay/session/clear", None, "relay_session_clear"),
+    ("/_relay/search", "POST", "relay_search"),
+    ("/_relay/stats", None, "relay_stats"),
+    ("/_relay/traffic_active", None, "relay_traffic_active"),
+    ("/_relay/connectivity", None, "relay_connectivity"),
+    ("/_relay/scripts/load_status", None, "relay_scripts_load_status"),
+    ("/_relay/export_session_ndjson", None, "relay_export_session_ndjson"),
+    ("/_relay/export_session", None, "relay_export_session"),
+    ("/_relay/export_har", None, "relay_export_har"),
+    ("/_relay/export_progress", None, "relay_export_progress"),
+    ("/_relay/import_session_file", None, "relay_import_session_file"),
+    ("/_relay/import_session", None, "relay_import_session"),
+    ("/_relay/import_har_file", None, "relay_import_har_file"),
+    ("/_relay/import_har", None, "relay_import_har"),
+)
+# Exact-path index: method-agnostic routes keyed by path, the rest by (path, method)
+_RELAY_EXACT_ROUTES = {
+    (fragment if route_method is None else (fragment, route_method)): route
+    for fragment, route_method, route in _RELAY_ROUTES
+}
+# CORS preflight answer for every /_relay endpoint
+_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+# Distinguishes "not passed" from a passed None/empty value
+_UNSET: Any = object()
+# WebSocket messages arriving within this window share one flow snapshot
+_WS_CAPTURE_INTERVAL = 0.1
+# Bound once for startedDateTime (flows and TLS errors); tz passed positionally.
+# datetime's C isoformat beats a hand-rolled time.gmtime() f-string here.
+_fromtimestamp = datetime.fromtimestamp
+_UTC = timezone.utc
+
+
+def _safe_json_default(obj):
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', 'replace')
+    try:
+        return str(obj)
+    except Exception:
+        return "<Non-serializable>"
+
 
 class TrafficMonitor:
     """Converts mitmproxy flows to HAR-compatible format with SQLite persistence."""
 
+    # Flows awaiting the writer thread; when SQLite falls behind, capture
+    # blocks instead of piling snapshots (bodies included) up in memory.
+    _STORE_QUEUE_MAX = 256
+    _STORE_PUT_TIMEOUT = 1.0
+    _STORE_BATCH_MAX = 64
+
     def __init__(self, debug_mgr: DebugManager):
         self.logger = setup_logging()
         self.debug_mgr = debug_mgr
@@ -56,6 +145,17 @@ class TrafficMonitor:
         self.db = FlowDatabase()
         self.logger.info("FlowDatabase initialized for traffic persistence")
 
+        # Persisting a flow (body compression, JSON, SQLite commit) runs on a
+        # single writer thread so proxy hooks only pay for process_flow. One
+        # FIFO keeps successive snapshots of the same flow in order.
+        self._store_queue: "queue.Queue[Optional[Tuple[Dict, str]]]" = queue.Queue(
+            maxsize=self._STORE_QUEUE_MAX
+        )
+        self._store_thread = threading.Thread(
+            target=self._store_worker, name="TrafficMonitor-Store", daemon=True
+        )
+        self._store_thread.start()
+
         # SSE state (used by sse_processor module)
         self._sse_lock = threading.Lock()
         self._sse_states: Dict[str, Dict[str, Any]] = {}
@@ -70,64 +170,69 @@ class TrafficMonitor:
         self._ws_flows_lock = threading.Lock()
         self._ws_flows: Dict[str, http.HTTPFlow] = {}
         self._ws_inject_max_payload_bytes = 1024 * 1024
+        # Encoded frame fields of open WS flows: flow_id -> (first abs seq, frames).
+        # Received frames don't change, so each snapshot only encodes new ones.
+        self._ws_frame_cache: Dict[str, Tuple[int, List[tuple]]] = {}
+        # Pending coalesced captures: flow_id -> asyncio.TimerHandle. Kept off
+        # flow.metadata, which mitmproxy deep-copies in get_state().
+        self._ws_capture_timers: Dict[str, asyncio.TimerHandle] = {}
 
     # ==================== Content Processing ====================
 
     def decode_content(
-        self, message: Any
+        self, message: Any, content: Any = _UNSET, content_type: Any = _UNSET
     ) -> Tuple[str, str, bool]:
         """
         Decode message content for storage.
 
+        ``content`` and ``content_type`` may be passed when the caller has
+        already read them, so neither is looked up twice per flow.
+
         Returns:
             Tuple of (content, encoding, truncated)
         """
-        if not message.content:
+        if content is _UNSET:
+            content = message.content
+        if not content:
             return "", "text", False
 
-        # Detect content type
-        content_type = ""
-        for k, v in message.headers.items():
-            if k.lower() == "content-type":
-                content_type = v.lower()
-                break
-
-        # Binary content types
-        binary_types = [
-            "image/", "video/", "audio/",
-            "application/octet-stream", "application/pdf",
-            "application/zip", "application/x-protobuf",
-            "application/x-tar", "application/gzip",
-            "font/"
-        ]
-
-        # Magic number detection
-        is_magic_binary = False
-        prefix = message.content[:4]
-        if (prefix.startswith(b'\xff\xd8\xff') or
-            prefix.startswith(b'\x89PNG') or
-            prefix.startswith(b'GIF8') or
-            (len(prefix) > 1 and prefix[0] == 0)):
-            is_magic_binary = True
-
-        should_be_binary = any(t in content_type for t in binary_types) or is_magic_binary
+        # Bodies past the persistence cap are replaced by a placeholder at
+        # store time anyway; skip decoding/base64 of the full payload.
+        if len(content) > Config.MAX_PERSIST_SIZE:
+            return get_placeholder(f"skipped:{len(content)}"), "text", True
+
+        # Detect content type (Headers lookups are case-insensitive)
+        if content_type is _UNSET:
+            content_type = message.headers.get("content-type")
+        content_type = (content_type or "").lower()
+
+        # Media type first, then magic numbers (JPEG/PNG/GIF, or a leading NUL)
+        should_be_binary = (
+            content_type.lstrip().startswith(_BINARY_MIME_PREFIXES)
+            or content.startswith(_BINARY_MAGIC)
+            or (len(content) > 1 and content[0] == 0)
+        )
 
         # Encode binary as base64
         if should_be_binary:
             try:
-                return base64.b64encode(message.content).decode('ascii'), "base64", False
+                return b64encode_as_string(content), "base64", False
             except Exception as e:
                 return f"<Error encoding binary: {e}>", "text", False
 
+        # Pure-ASCII bodies (the common case) decode without a fallible path
+        if content.isascii():
+            return content.decode('ascii'), "text", False
+
         # Try UTF-8
         try:
-            return message.content.decode('utf-8'), "text", False
+            return content.decode('utf-8'), "text", False
         except UnicodeDecodeError:
             pass
 
         # Fallback to base64
         try:
-            return base64.b64encode(message.content).decode('ascii'), "base64", False
+            return b64encode_as_string(content), "base64", False
         except Exception as e:
             return f"<Error encoding content: {e}>", "text", False
 
@@ -141,19 +246,20 @@ class TrafficMonitor:
         }
         duration = 0.0
 
-        if not flow.request.timestamp_start:
+        request = flow.request
+        t_start = request.timestamp_start
+        if not t_start:
             return timings, duration
 
-        t_start = flow.request.timestamp_start
-        t_end = (
-            flow.response.timestamp_end
-            if (flow.response and flow.response.timestamp_end)
-            else time.time()
-        )
+        # Read each timestamp once; they are plain attributes on live objects
+        response = flow.response
+        res_start = response.timestamp_start if response else None
+        res_end = response.timestamp_end if response else None
+        t_end = res_end or time.time()
         duration = (t_end - t_start) * 1000
 
-        if flow.server_conn and hasattr(flow.server_conn, "timestamp_start"):
-            conn = flow.server_conn
+        conn = flow.server_conn
+        if conn and hasattr(conn, "timestamp_start"):
             ts_start = getattr(conn, "timestamp_start", None)
             ts_tcp = getattr(conn, "timestamp_tcp_setup", None)
             ts_tls = getattr(
@@ -168,21 +274,13 @@ class TrafficMonitor:
                 if ts_tcp and ts_tls:
                     timings["ssl"] = max(0, (ts_tls - ts_tcp) * 1000)
 
-            if (flow.request.timestamp_end and
-                    flow.response and
-                    flow.response.timestamp_start):
-                timings["wait"] = max(0, (
-                    flow.response.timestamp_start - flow.request.timestamp_end
-                ) * 1000)
-
-        if (flow.response and
-                flow.response.timestamp_start and
-                flow.response.timestamp_end):
-            timings["receive"] = max(
-                0,
-                (flow.response.timestamp_end - flow.response.timestamp_start) * 1000
-            )
-        elif flow.response and flow.response.timestamp_start:
+            req_end = request.timestamp_end
+            if req_end and res_start:
+                timings["wait"] = max(0, (res_start - req_end) * 1000)
+
+        if res_start and res_end:
+            timings["receive"] = max(0, (res_end - res_start) * 1000)
+        elif res_start:
             wait_ms = timings["wait"] if timings["wait"] >= 0 else 0
             timings["receive"] = max(0, duration - wait_ms)
 
@@ -218,22 +316,20 @@ class TrafficMonitor:
             except TypeError:
                 injected_seqs = set()
 
+        flow_id = flow.id
+        encoded = self._encode_ws_frames(flow_id, flow.websocket.messages, slice_start, ws_open)
         ws_frames = []
-        for i, m in enumerate(flow.websocket.messages[-500:]):
-            abs_seq = slice_start + i
+        for i, (abs_seq, msg_type, from_client, content, encoding, timestamp, length) in enumerate(encoded):
             frame = {
-                "id": f"{flow.id}-{abs_seq}",
-                "flowId": flow.id,
+                "id": f"{flow_id}-{abs_seq}",
+                "flowId": flow_id,
                 "seq": i,
-                "type": m.type.name.lower() if hasattr(m.type, 'name') else str(m.type),
-                "fromClient": m.from_client,
-                "content": (
-                    m.text if m.is_text
-                    else (base64.b64encode(m.content).decode("ascii") if m.content else "")
-                ),
-                "encoding": "text" if m.is_text else "base64",
-                "timestamp": m.timestamp * 1000,
-                "length": len(m.content) if m.content else 0,
+                "type": msg_type,
+                "fromClient": from_client,
+                "content": content,
+                "encoding": encoding,
+                "timestamp": timestamp,
+                "length": length,
             }
             if abs_seq in injected_seqs:
                 frame["injected"] = True
@@ -241,6 +337,41 @@ class TrafficMonitor:
 
         return {"frames": ws_frames, "count": ws_frame_count, "open": ws_open}
 
+    def _encode_ws_frames(self, flow_id: str, messages: list, slice_start: int, ws_open: bool) -> List[tuple]:
+        """Encoded fields of messages[slice_start:], reusing frames encoded by earlier snapshots."""
+        cache = self._ws_frame_cache
+        cached = cache.pop(flow_id, None)
+        frames: List[tuple] = []
+        next_seq = slice_start
+        if cached is not None:
+            first_seq, cached_frames = cached
+            if first_seq <= slice_start < first_seq + len(cached_frames):
+                frames = cached_frames[slice_start - first_seq:]
+                next_seq = slice_start + len(frames)
+
+        for abs_seq in range(next_seq, len(messages)):
+            m = messages[abs_seq]
+            content = m.content
+            msg_type = m.type
+            if m.is_text:
+                body, encoding = m.text, "text"
+            else:
+                body, encoding = (b64encode_as_string(content) if content else ""), "base64"
+            frames.append((
+                abs_seq,
+                msg_type.name.lower() if hasattr(msg_type, 'name') else str(msg_type),
+                m.from_client,
+                body,
+                encoding,
+                m.timestamp * 1000,
+                len(content) if content else 0,
+            ))
+
+        # Closed flows get no more snapshots worth caching for
+        if ws_open:
+            cache[flow_id] = (slice_start, frames)
+        return frames
+
     def _build_sse_data(self, flow: http.HTTPFlow, content_type: Optional[str]) -> dict:
         """Extract SSE event data and manage SSE state."""
         is_sse = bool(flow.metadata.get("_relaycraft_is_sse")) or sse_processor.is_sse_content_type(
@@ -279,10 +410,21 @@ class TrafficMonitor:
         """
         try:
             # ========== Body Decoding ==========
-            req_body, req_enc, req_truncated = self.decode_content(flow.request)
+            # Bodies and the response Content-Type are read once and shared:
+            # each .content access re-enters mitmproxy's content decoding.
+            response = flow.response
+            req_content = flow.request.content
+            req_body, req_enc, req_truncated = self.decode_content(flow.request, req_content)
+            res_content = None
+            content_type = None
             res_body, res_enc, res_truncated = "", "text", False
-            if flow.response:
-                res_body, res_enc, res_truncated = self.decode_content(flow.response)
+            if response:
+                res_content = response.content
+                content_type = response.headers.get("content-type")
+                res_body, res_enc, res_truncated = self.decode_content(response, res_content, content_type)
+
+            req_size = len(req_content) if req_content else 0
+            res_size = len(res_content) if res_content else 0
 
             # ========== Sub-Processing ==========
             timings, duration = self._build_timings(flow)
@@ -302,17 +444,16 @@ class TrafficMonitor:
             is_paused = False
             paused_at = None
             is_aborted = flow.metadata.get("_relaycraft_aborted", False)
-            with self.debug_mgr.lock:
-                if flow.id in self.debug_mgr.intercepted_flows:
+            intercepted = self.debug_mgr.intercepted_flows
+            # Nothing paused is the common case: skip the lock entirely
+            if intercepted:
+                with self.debug_mgr.lock:
+                    info = intercepted.get(flow.id)
+                if info is not None:
                     is_paused = True
-                    paused_at = self.debug_mgr.intercepted_flows[flow.id]["phase"]
+                    paused_at = info["phase"]
 
-            # ========== Content Type & SSE ==========
-            content_type = None
-            for h in flow.response.headers.fields if flow.response else []:
-                if h[0].lower() == b'content-type':
-                    content_type = safe_decode(h[1])
-                    break
+            # ========== SSE ==========
             sse = self._build_sse_data(flow, content_type)
 
             # ========== Error Handling ==========
@@ -350,11 +491,15 @@ class TrafficMonitor:
                 status_code = 0
 
             # ========== Build HAR-Compatible Structure ==========
-            started_dt = datetime.fromtimestamp(
-                flow.request.timestamp_start, tz=timezone.utc
-            ).isoformat() if flow.request.timestamp_start else ""
+            ts_start = flow.request.timestamp_start
+            started_dt = _fromtimestamp(ts_start, _UTC).isoformat() if ts_start else ""
 
-            hits = flow.metadata.get("_relaycraft_hits", [])
+            # Only fall back to the clock when no capture time was stamped
+            msg_ts = flow.metadata.get("_relaycraft_msg_ts")
+            if msg_ts is None:
+                msg_ts = time.time()
+
+            hits = list(flow.metadata.get("_relaycraft_hits", []))
             hits.extend(getattr(flow, "_relaycraft_script_hits", []))
             hits.extend(getattr(flow, "_relaycraft_breakpoint_hits", []))
 
@@ -375,7 +520,7 @@ class TrafficMonitor:
                         "mimeType": content_type or "text/plain",
                         "text": req_body,
                     } if req_body else None,
-                    "bodySize": len(flow.request.content) if flow.request.content else 0,
+                    "bodySize": req_size,
                     "headersSize": -1,
                     "_parsedUrl": {
                         "scheme": "https" if url.startswith("https") or url.startswith("wss") else "http",
@@ -393,13 +538,13 @@ class TrafficMonitor:
                     "headers": headers_to_har(flow.response.headers) if flow.response else [],
                     "cookies": cookies_to_har(flow.response.cookies) if flow.response else [],
                     "content": {
-                        "size": len(flow.response.content) if flow.response and flow.response.content else 0,
+                        "size": res_size,
                         "mimeType": content_type or "",
                         "text": res_body,
                         "encoding": res_enc,
                     },
                     "headersSize": -1,
-                    "bodySize": len(flow.response.content) if flow.response and flow.response.content else 0,
+                    "bodySize": res_size,
                     "redirectUrl": "",
                 },
 
@@ -429,12 +574,11 @@ class TrafficMonitor:
                     "bodyTruncated": req_truncated or res_truncated,
                 },
 
-                "msg_ts": flow.metadata.get("_relaycraft_msg_ts", time.time()),
+                "msg_ts": msg_ts,
             }
 
         except Exception as e:
             self.logger.error(f"Error processing flow: {e}")
-            import traceback
             traceback.print_exc()
             return None
 
@@ -461,11 +605,12 @@ class TrafficMonitor:
 
             error_msg = str(conn_error) if conn_error else "Client TLS Handshake Failed"
             flow_id = str(uuid.uuid4())
+            now = time.time()
 
             flow_data = {
                 "id": flow_id,
                 "order": 0,
-                "startedDateTime": datetime.now(tz=timezone.utc).isoformat(),
+                "startedDateTime": _fromtimestamp(now, _UTC).isoformat(),
                 "time": 0,
                 "request": {
                     "method": "CONNECT",
@@ -503,7 +648,7 @@ class TrafficMonitor:
                     "intercept": {"intercepted": False, "phase": None},
                     "bodyTruncated": False,
                 },
-                "msg_ts": time.time(),
+                "msg_ts": now,
             }
 
             self._store_flow(flow_data)
@@ -515,10 +660,33 @@ class TrafficMonitor:
 
     def handle_websocket_message(self, flow: http.HTTPFlow) -> None:
         """Called when a new websocket message arrives."""
-        flow.metadata["_relaycraft_msg_ts"] = time.time()
-        flow_data = self.process_flow(flow)
-        if flow_data:
-            self._store_flow(flow_data)
+        # Each snapshot re-serializes up to 500 frames, so a burst of
+        # messages is coalesced into one capture shortly after the first.
+        timers = self._ws_capture_timers
+        if flow.id in timers:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._capture_ws_flow(flow)
+            return
+        timers[flow.id] = loop.call_later(_WS_CAPTURE_INTERVAL, self._capture_ws_flow, flow)
+
+    def cancel_ws_capture(self, flow: http.HTTPFlow) -> None:
+        """Cancel a pending coalesced capture so it can't re-store a closed flow."""
+        timer = self._ws_capture_timers.pop(flow.id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _capture_ws_flow(self, flow: http.HTTPFlow) -> None:
+        self._ws_capture_timers.pop(flow.id, None)
+        try:
+            flow.metadata["_relaycraft_msg_ts"] = time.time()
+            flow_data = self.process_flow(flow)
+            if flow_data:
+                self._store_flow(flow_data)
+        except Exception as e:
+            self.logger.error(f"Error capturing WebSocket flow: {e}")
 
     # ==================== HTTP Handlers ====================
 
@@ -527,60 +695,18 @@ class TrafficMonitor:
         method = flow.request.method
         host = flow.request.host
 
-        if method == "OPTIONS" and path.startswith("/_relay"):
-            return "relay_options"
-        if "/_relay/poll" in path:
-            return "relay_poll"
-        if "/_relay/detail" in path:
-            return "relay_detail"
-        if "/_relay/sse" in path:
-            return "relay_sse"
-        if "/_relay/ws/inject" in path:
-            return "relay_ws_inject"
-        if "/_relay/breakpoints" in path:
-            return "relay_breakpoints"
-        if "/_relay/resume" in path:
-            return "relay_resume"
-        if "/_relay/database/reset" in path:
-            return "relay_database_reset"
-        if "/_relay/sessions/delete_all" in path:
-            return "relay_sessions_delete_all"
-        if "/_relay/sessions" in path and method == "GET":
-            return "relay_sessions_get"
-        if "/_relay/sessions" in path and method == "POST":
-            return "relay_sessions_post"
-        if "/_relay/session/new" in path and method == "POST":
-            return "relay_session_new"
-        if "/_relay/session/activate" in path:
-            return "relay_session_activate"
-        if "/_relay/session/delete" in path:
-            return "relay_session_delete"
-        if "/_relay/session/clear" in path:
-            return "relay_session_clear"
-        if "/_relay/search" in path and method == "POST":
-            return "relay_search"
-        if "/_relay/stats" in path:
-            return "relay_stats"
-        if "/_relay/traffic_active" in path:
-            return "relay_traffic_active"
-        if "/_relay/connectivity" in path:
-            return "relay_connectivity"
-        if "/_relay/scripts/load_status" in path:
-            return "relay_scripts_load_status"
-        if "/_relay/export_session" in path:
-            return "relay_export_session"
-        if "/_relay/export_har" in path:
-            return "relay_export_har"
-        if "/_relay/export_progress" in path:
-            return "relay_export_progress"
-        if "/_relay/import_session" in path and "_file" not in path:
-            return "relay_import_session"
-        if "/_relay/import_session_file" in path:
-            return "relay_import_session_file"
-        if "/_relay/import_har" in path and "_file" not in path:
-            return "relay_import_har"
-        if "/_relay/import_har_file" in path:
-            return "relay_import_har_file"
+        if path.startswith("/_relay"):
+            if method == "OPTIONS":
+                return "relay_options"
+            # Clients call the exact endpoint paths: one dict probe
+            base = path.partition("?")[0]
+            route = _RELAY_EXACT_ROUTES.get(base) or _RELAY_EXACT_ROUTES.get((base, method))
+            if route:
+                return route
+            # Trailing-slash and sub-path variants of the same endpoints
+            for fragment, route_method, route in _RELAY_ROUTES:
+                if fragment in base and (route_method is None or route_method == method):
+                    return route
         if (
             host == "relay.guide"
             or path == "/cert"
@@ -595,31 +721,21 @@ class TrafficMonitor:
         from mitmproxy.http import Response
 
         route_key = self._resolve_request_route(flow)
+        if not route_key:
+            return
 
         # CORS preflight
         if route_key == "relay_options":
-            flow.response = Response.make(200, b"", {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            })
+            flow.response = Response.make(200, b"", _PREFLIGHT_HEADERS)
             return
 
-        def safe_json_default(obj):
-            if isinstance(obj, bytes):
-                return obj.decode('utf-8', 'replace')
-            try:
-                return str(obj)
-            except Exception:
-                return "<Non-serializable>"
-
-        if handle_realtime_routes(self, flow, route_key, Response, safe_json_default):
+        if handle_realtime_routes(self, flow, route_key, Response, _safe_json_default):
             return
 
         if handle_control_routes(self, flow, route_key, Response):
             return
 
-        if handle_data_routes(self, flow, route_key, Response, safe_json_default):
+        if handle_data_routes(self, flow, route_key, Response, _safe_json_default):
             return
 
         if handle_import_routes(self, flow, route_key, Response):
@@ -632,54 +748,114 @@ class TrafficMonitor:
 
     def _build_session_indices(self, flows: list) -> list:
         """Build lightweight index dicts from already-parsed session flows."""
-        indices = []
-        for f in flows:
-            rc = f.get("_rc") or {}
-            req = f.get("request") or {}
-            resp = f.get("response") or {}
-            parsed_url = req.get("_parsedUrl") or {}
-            indices.append({
-                "id": f.get("id"),
-                "msg_ts": f.get("msg_ts", 0),
-                "method": req.get("method") or "",
-                "url": req.get("url") or "",
-                "host": parsed_url.get("host") or f.get("host") or "",
-                "path": parsed_url.get("path") or f.get("path") or "",
-                "status": resp.get("status") or 0,
-                "contentType": (resp.get("content") or {}).get("mimeType", "") or f.get("contentType") or "",
-                "startedDateTime": f.get("startedDateTime") or "",
-                "time": f.get("time") or 0,
-                "size": (resp.get("content") or {}).get("size", 0) or f.get("size") or 0,
-                "clientIp": rc.get("clientIp") or "",
-                "appName": rc.get("appName") or "",
-                "appDisplayName": rc.get("appDisplayName") or "",
-                "hasError": bool(rc.get("error")),
-                "hasRequestBody": bool((req.get("postData") or {}).get("text")),
-                "hasResponseBody": bool((resp.get("content") or {}).get("text")),
-                "isWebsocket": bool(rc.get("isWebsocket")),
-                "isSse": bool(rc.get("isSse")),
-                "websocketFrameCount": rc.get("websocketFrameCount") or 0,
-                "isIntercepted": bool((rc.get("intercept") or {}).get("intercepted")),
-                "hits": [
-                    {
-                        "id": (h or {}).get("id") or "",
-                        "name": (h or {}).get("name") or "",
-                        "type": (h or {}).get("type") or "",
-                        "status": (h or {}).get("status"),
-                    }
-                    for h in (rc.get("hits") or [])
-                ],
-            })
-        return indices
+        return [build_index_record(f) for f in flows]
 
     def _store_flow(self, flow_data: Dict) -> None:
-        """Store flow data to database."""
+        """Queue flow data for the database writer thread."""
         try:
-            _store_flow_repo(self.db, flow_data)
+            # Resolve the session now so a session switch can't re-home flows
+            # captured before it.
+            session_id = self.db._get_session_id()
+            item = (flow_data, session_id)
+            while True:
+                try:
+                    self._store_queue.put(item, timeout=self._STORE_PUT_TIMEOUT)
+                    return
+                except queue.Full:
+                    if not self._store_thread.is_alive():
+                        # No writer left: write in order on this thread
+                        self._drain_store_queue()
+                        _store_flow_group(self.db, [item])
+                        return
+                    self.logger.warning(
+                        f"Store queue full for {self._STORE_PUT_TIMEOUT}s; "
+                        "waiting for the database writer"
+                    )
+        except Exception as e:
+            self.logger.error(f"Error queueing flow for storage: {e}")
+
+    def _store_worker(self) -> None:
+        """Drain queued flows into the database until the stop sentinel.
+
+        Whatever queued up while the previous write ran is committed as one
+        transaction (up to _STORE_BATCH_MAX flows).
+        """
+        store_queue = self._store_queue
+        while True:
+            batch = [store_queue.get()]
+            while batch[-1] is not None and len(batch) < self._STORE_BATCH_MAX:
+                try:
+                    batch.append(store_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            items = batch[:-1] if stop else batch
+            try:
+                if items:
+                    _store_flow_group(self.db, items)
+            except Exception as e:
+                self.logger.error(f"Error storing flow to database: {e}")
+                self.logger.error(traceback.format_exc())
+            finally:
+                for _ in batch:
+                    store_queue.task_done()
+            if stop:
+                return
+
+    def flush_stores(self, timeout: float = 5.0) -> bool:
+        """Wait up to ``timeout`` seconds for every queued flow to be written.
+
+        If the writer thread is gone (crashed, or stopped by
+        stop_store_worker) the queue is drained inline instead. Returns
+        False when the wait timed out.
+        """
+        store_queue = self._store_queue
+        if not self._store_thread.is_alive():
+            self._drain_store_queue()
+            return True
+        deadline = time.monotonic() + timeout
+        with store_queue.all_tasks_done:
+            while store_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.logger.warning(
+                        f"Timed out after {timeout}s waiting for "
+                        f"{store_queue.unfinished_tasks} queued flow writes"
+                    )
+                    return False
+                store_queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _drain_store_queue(self) -> None:
+        """Write whatever is still queued on the calling thread."""
+        store_queue = self._store_queue
+        batch = []
+        while True:
+            try:
+                batch.append(store_queue.get_nowait())
+            except queue.Empty:
+                break
+        items = [item for item in batch if item is not None]
+        try:
+            if items:
+                _store_flow_group(self.db, items)
         except Exception as e:
-            import traceback
             self.logger.error(f"Error storing flow to database: {e}")
-            self.logger.error(traceback.format_exc())
+        finally:
+            for _ in batch:
+                store_queue.task_done()
+
+    def stop_store_worker(self, timeout: float = 5.0) -> None:
+        """Flush queued flows and stop the writer thread."""
+        if not self._store_thread.is_alive():
+            self._drain_store_queue()
+            return
+        try:
+            self._store_queue.put(None, timeout=timeout)
+        except queue.Full:
+            self.logger.warning("Store queue still full; database writer not stopped")
+            return
+        self._store_thread.join(timeout)
 
     def handle_response(self, flow: http.HTTPFlow) -> None:
         """Capture flows on response."""
@@ -18,6 +18,10 @@ class RelayCraftLogger:
             pass
         return getattr(self._fallback_logger, level)
 
+    def isEnabledFor(self, level: int) -> bool:
+        # ctx.log forwards to stdlib logging, so both paths share this threshold
+        return self._fallback_logger.isEnabledFor(level)
+
     def info(self, msg: str):
         self._get_log_func("info")(f"{msg}")
 
@@ -20,6 +20,9 @@ def unregister_ws_flow(monitor: Any, flow: Any) -> None:
         return
     with monitor._ws_flows_lock:
         monitor._ws_flows.pop(flow.id, None)
+    # The frame cache is only dropped by a closed snapshot; make sure
+    # flows that end without one don't leak their encoded frames.
+    monitor._ws_frame_cache.pop(flow.id, None)
 
 
 def is_ws_closed(ws: Any) -> bool:
@@ -8,10 +8,18 @@ This runs once during proxy startup, not per-request.
 import sys
 import ast
 import argparse
+import hashlib
 import logging
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Transformed source keyed by a digest of the original source, so the same
+# script content is only parsed/transformed/unparsed once per process.
+# Bounded LRU so repeatedly edited scripts don't accumulate stale entries.
+_TRANSFORM_CACHE_MAX = 64
+_transform_cache = OrderedDict()
+
 
 class TrackingInjector(ast.NodeTransformer):
     """AST transformer to inject record_hit calls into hook functions"""
@@ -214,6 +222,12 @@ def inject_tracking(source_code, script_path=None):
     If script_path is provided, errors will include the path for debugging.
     """
     path_info = f" ({script_path})" if script_path else ""
+    source_key = hashlib.blake2b(source_code.encode("utf-8"), digest_size=16).hexdigest()
+    cached = _transform_cache.get(source_key)
+    if cached is not None:
+        _transform_cache.move_to_end(source_key)
+        return cached
+
     try:
         # Parse source code
         tree = ast.parse(source_code)
@@ -230,6 +244,9 @@ def inject_tracking(source_code, script_path=None):
             result = ast.unparse(new_tree)
             if injector.injected_count > 0:
                 logger.debug(f"Successfully injected {injector.injected_count} tracking call(s) into script{path_info}")
+            _transform_cache[source_key] = result
+            if len(_transform_cache) > _TRANSFORM_CACHE_MAX:
+                _transform_cache.popitem(last=False)
             return result
         else:
             # Fallback for older python (should not happen in our env)
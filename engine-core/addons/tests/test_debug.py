@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+import tests.mock_mitmproxy  # noqa: F401
+
+from core.debug import DebugManager
+
+
+def _flow(url: str, path: str = "/api"):
+    return SimpleNamespace(request=SimpleNamespace(pretty_url=url, path=path), metadata={})
+
+
+class TestDebugManagerShouldIntercept(unittest.TestCase):
+    def test_matches_by_phase_in_rule_order(self):
+        mgr = DebugManager()
+        mgr.add_breakpoint({"id": "a", "pattern": "example.com/api"})
+        mgr.add_breakpoint({"id": "b", "pattern": "EXAMPLE\\.com", "matchType": "regex",
+                            "breakOnRequest": True, "breakOnResponse": True})
+        mgr.add_breakpoint({"id": "c", "pattern": "https://example.com/x", "matchType": "exact",
+                            "breakOnResponse": True})
+
+        self.assertEqual(mgr.should_intercept(_flow("https://example.com/api/v1"))["id"], "a")
+        self.assertEqual(mgr.should_intercept(_flow("https://example.com/x"), "response")["id"], "b")
+        self.assertIsNone(mgr.should_intercept(_flow("https://other.org/"), "response"))
+
+    def test_edits_rebuild_matchers(self):
+        mgr = DebugManager()
+        flow = _flow("https://example.com/api")
+        mgr.add_breakpoint({"id": "a", "pattern": "example"})
+        self.assertIsNotNone(mgr.should_intercept(flow))
+
+        mgr.add_breakpoint({"id": "a", "pattern": "example", "enabled": False})
+        self.assertIsNone(mgr.should_intercept(flow))
+
+        mgr.add_breakpoint({"id": "b", "pattern": "[unclosed", "matchType": "regex"})
+        self.assertIsNone(mgr.should_intercept(flow))
+        self.assertIsNotNone(mgr.should_intercept(_flow("https://x/[unclosed")))
+
+        mgr.clear_breakpoints()
+        self.assertIsNone(mgr.should_intercept(_flow("https://x/[unclosed")))
+
+    def test_cached_match_is_reused_across_phases_until_rules_change(self):
+        mgr = DebugManager()
+        mgr.add_breakpoint({"id": "a", "pattern": "example", "breakOnResponse": True})
+        flow = _flow("https://example.com/api")
+
+        self.assertEqual(mgr.should_intercept(flow)["id"], "a")
+        cached = flow.metadata["_relaycraft_bp_match"]
+        self.assertEqual(mgr.should_intercept(flow, "response")["id"], "a")
+        self.assertIs(flow.metadata["_relaycraft_bp_match"], cached)
+
+        mgr.add_breakpoint({"id": "a", "pattern": "example", "breakOnResponse": False})
+        mgr.add_breakpoint({"id": "b", "pattern": "example", "breakOnResponse": True})
+        self.assertEqual(mgr.should_intercept(flow, "response")["id"], "b")
+
+    def test_internal_paths_are_never_intercepted(self):
+        mgr = DebugManager()
+        mgr.add_breakpoint({"id": "a", "pattern": "_relay"})
+        self.assertIsNone(mgr.should_intercept(_flow("http://127.0.0.1/_relay/poll", "/_relay/poll")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+from core.flowdb import body_storage
+
+_CONFIG = SimpleNamespace(COMPRESS_THRESHOLD=16, FILE_THRESHOLD=1024, MAX_PERSIST_SIZE=4096)
+
+
+class TestFlowDbBodyStorage(unittest.TestCase):
+    def test_process_body_tiers_round_trip(self):
+        body_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, body_dir, True)
+        medium = "é" * 100
+        large = "x" * 2048
+
+        data, ref = body_storage.process_body(body_dir, "f1", "s1", medium, "response", _CONFIG)
+        self.assertEqual(ref, "compressed")
+        self.assertEqual(gzip.decompress(data).decode("utf-8"), medium)
+
+        data, ref = body_storage.process_body(body_dir, "f1", "s1", large, "request", _CONFIG)
+        self.assertIsNone(data)
+        self.assertEqual(ref, "file:f1_r.dat")
+        loaded = body_storage.load_body(None, body_dir, "f1", "s1", ref, "request")
+        self.assertEqual(loaded, large)
+
+        self.assertEqual(body_storage.process_body(body_dir, "f1", "s1", "tiny", "request", _CONFIG), (None, "inline"))
+        self.assertEqual(
+            body_storage.process_body(body_dir, "f1", "s1", "y" * 5000, "request", _CONFIG),
+            (None, "skipped:5000"),
+        )
+
+    def test_repeated_body_reuses_compressed_bytes(self):
+        body = "repeated bundle " * 10
+        first, _ = body_storage.process_body("", "f1", "s1", body, "response", _CONFIG)
+        second, _ = body_storage.process_body("", "f2", "s1", body, "response", _CONFIG)
+        self.assertIs(first, second)
+
+    def test_file_tier_and_large_bodies_bypass_compress_cache(self):
+        body_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, body_dir, True)
+        large = "z" * 2048
+        body_storage.process_body(body_dir, "f1", "s1", large, "request", _CONFIG)
+        body_storage.process_body(body_dir, "f2", "s1", large, "request", _CONFIG)
+
+        oversized = b"q" * (body_storage._COMPRESS_CACHE_MAX_BODY + 1)
+        self.assertIsNot(body_storage._compress(oversized), body_storage._compress(oversized))
+        for data in (large.encode("utf-8"), oversized):
+            key = body_storage.hashlib.blake2b(data, digest_size=16).digest()
+            self.assertNotIn(key, body_storage._compress_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import os
 import sqlite3
 import sys
+import threading
 import time
 import unittest
 from unittest.mock import MagicMock, patch
@@ -11,12 +12,13 @@ addons_dir = os.path.dirname(current_dir)
 sys.path.append(addons_dir)
 
 from core.flowdb import cleanup
-from core.flowdb.schema import Config
+from core.flowdb.schema import Config, SCHEMA
 
 
 class _FakeDb:
     def __init__(self, conn: sqlite3.Connection):
         self._conn = conn
+        self._lock = threading.RLock()
         self.logger = MagicMock()
         self.db_path = "/tmp/relaycraft-test-nonexistent.db"
         self.body_dir = "/tmp/relaycraft-test-bodies"
@@ -26,6 +28,9 @@ class _FakeDb:
     def _get_conn(self):
         return self._conn
 
+    def _get_read_conn(self):
+        return self._conn
+
     def delete_session(self, session_id):
         self.deleted_sessions.append(session_id)
 
@@ -130,6 +135,95 @@ class TestFlowDbCleanup(unittest.TestCase):
         self.assertEqual(detail_ids, {live_id})
         self.assertEqual(body_ids, {live_id})
 
+    def test_run_cleanup_total_limit_excludes_aged_flows_from_excess(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        now = time.time()
+        old_ts = now - 3 * 24 * 3600
+
+        conn.execute("INSERT INTO sessions(id, is_active, flow_count) VALUES ('s1', 1, 8)")
+        aged_ids = [f"aged_{idx}" for idx in range(3)]
+        recent_ids = [f"recent_{idx}" for idx in range(5)]
+        conn.executemany(
+            "INSERT INTO flow_indices(id, session_id, msg_ts) VALUES (?, 's1', ?)",
+            [(fid, old_ts + idx) for idx, fid in enumerate(aged_ids)]
+            + [(fid, now + idx) for idx, fid in enumerate(recent_ids)],
+        )
+        conn.commit()
+
+        db = _FakeDb(conn)
+        original = (
+            Config.MAX_FLOW_AGE_DAYS,
+            Config.MAX_TOTAL_FLOWS,
+            Config.MAX_DB_SIZE_MB,
+        )
+        try:
+            Config.MAX_FLOW_AGE_DAYS = 1
+            Config.MAX_TOTAL_FLOWS = 3
+            Config.MAX_DB_SIZE_MB = 100000
+            with patch("core.flowdb.cleanup.delete_body_files"):
+                cleanup.run_cleanup(db)
+        finally:
+            Config.MAX_FLOW_AGE_DAYS, Config.MAX_TOTAL_FLOWS, Config.MAX_DB_SIZE_MB = original
+
+        remaining = [row["id"] for row in conn.execute("SELECT id FROM flow_indices ORDER BY msg_ts")]
+        self.assertEqual(remaining, recent_ids[2:])
+
+    def test_run_cleanup_deletes_empty_inactive_sessions_in_one_pass(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        conn.executemany(
+            "INSERT INTO sessions(id, is_active, flow_count) VALUES (?, ?, ?)",
+            [
+                ("empty_a", 0, 0),
+                ("empty_b", 0, 0),
+                ("active_empty", 1, 0),
+                ("default", 0, 0),
+                ("inactive_full", 0, 3),
+            ],
+        )
+        conn.commit()
+
+        db = _FakeDb(conn)
+        original = (Config.MAX_FLOW_AGE_DAYS, Config.MAX_DB_SIZE_MB)
+        try:
+            Config.MAX_FLOW_AGE_DAYS = 0
+            Config.MAX_DB_SIZE_MB = 100000
+            with patch("core.flowdb.cleanup.delete_body_files") as mock_delete:
+                cleanup.run_cleanup(db)
+        finally:
+            Config.MAX_FLOW_AGE_DAYS, Config.MAX_DB_SIZE_MB = original
+
+        remaining = {row["id"] for row in conn.execute("SELECT id FROM sessions")}
+        self.assertEqual(remaining, {"active_empty", "default", "inactive_full"})
+        removed_dirs = {c.args[1] for c in mock_delete.call_args_list if c.args[2] is None}
+        self.assertEqual(removed_dirs, {"empty_a", "empty_b"})
+        self.assertEqual(db.notifications[-1]["params"]["sessions"], 2)
+
+    def test_schema_triggers_keep_session_counters_in_sync(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("PRAGMA recursive_triggers=ON")
+        conn.executescript(SCHEMA)
+        conn.execute(
+            "INSERT INTO sessions(id, name, created_at, updated_at) VALUES ('s1', 's1', 0, 0)"
+        )
+
+        insert_sql = """
+            INSERT OR REPLACE INTO flow_indices (
+                id, session_id, method, url, host, path, status,
+                started_datetime, time, size, msg_ts
+            ) VALUES (?, 's1', 'GET', 'u', 'h', '/', 200, '', 0, ?, ?)
+        """
+        counters_sql = "SELECT flow_count, total_size FROM sessions WHERE id = 's1'"
+        conn.execute(insert_sql, ("f1", 10, 1.0))
+        conn.execute(insert_sql, ("f1", 40, 2.0))  # re-store of the same flow
+        conn.execute(insert_sql, ("f2", 5, 3.0))
+        self.assertEqual(tuple(conn.execute(counters_sql).fetchone()), (2, 45))
+
+        conn.execute("DELETE FROM flow_indices WHERE id = 'f1'")
+        self.assertEqual(tuple(conn.execute(counters_sql).fetchone()), (1, 5))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import unittest
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+from core.flowdb import export
+from core.flowdb.schema import SCHEMA
+
+
+class _FakeDb:
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def _get_conn(self):
+        return self._conn
+
+    def _get_session_id(self, session_id=None):
+        return session_id or "s1"
+
+
+def _create_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO sessions(id, name, created_at, updated_at) VALUES (?, ?, 0, 0)",
+        [("s1", "s1"), ("s2", "s2")],
+    )
+    return conn
+
+
+def _insert_flow(conn, flow_id, session_id, msg_ts, bodies=None):
+    data = {
+        "id": flow_id,
+        "request": {"postData": {"text": ""}},
+        "response": {"content": {"text": ""}},
+    }
+    refs = {"request": "inline", "response": "inline"}
+    for body_type, text in (bodies or {}).items():
+        refs[body_type] = "compressed"
+        suffix = "_req" if body_type == "request" else "_res"
+        conn.execute(
+            "INSERT INTO flow_bodies(id, flow_id, session_id, type, data) VALUES (?, ?, ?, ?, ?)",
+            (flow_id + suffix, flow_id, session_id, body_type, gzip.compress(text.encode("utf-8"))),
+        )
+    conn.execute(
+        """
+        INSERT INTO flow_indices
+        (id, session_id, method, url, host, path, status, started_datetime, time, size, msg_ts)
+        VALUES (?, ?, 'GET', 'https://example.com/', 'example.com', '/', 200, '', 0, 0, ?)
+        """,
+        (flow_id, session_id, msg_ts),
+    )
+    conn.execute(
+        """
+        INSERT INTO flow_details(id, session_id, data, request_body_ref, response_body_ref)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (flow_id, session_id, json.dumps(data), refs["request"], refs["response"]),
+    )
+
+
+class TestFlowDbExport(unittest.TestCase):
+    def test_iter_all_flows_inlines_bodies_in_capture_order(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        _insert_flow(conn, "late", "s1", 2.0, {"response": "pong"})
+        _insert_flow(conn, "early", "s1", 1.0, {"request": "ping", "response": "ok"})
+        _insert_flow(conn, "other", "s2", 1.5, {"response": "elsewhere"})
+
+        flows = list(export.iter_all_flows(_FakeDb(conn), session_id="s1"))
+
+        self.assertEqual([f["id"] for f in flows], ["early", "late"])
+        self.assertEqual(flows[0]["request"]["postData"]["text"], "ping")
+        self.assertEqual(flows[0]["response"]["content"]["text"], "ok")
+        self.assertEqual(flows[1]["request"]["postData"]["text"], "")
+        self.assertEqual(flows[1]["response"]["content"]["text"], "pong")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+from core.flowdb import flow_repo
+from core.flowdb.schema import SCHEMA
+
+
+class _FakeDb:
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._lock = threading.RLock()
+        self.logger = MagicMock()
+        self._last_write_ts = 0.0
+
+    def _get_conn(self):
+        return self._conn
+
+    def _get_session_id(self, session_id=None):
+        return session_id or "s1"
+
+    def _process_body(self, flow_id, session_id, body, body_type):
+        return None, "inline"
+
+    def _maybe_cleanup(self):
+        pass
+
+    def _execute_with_retry(self, operation_name, operation):
+        return operation(self._conn)
+
+
+def _create_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA recursive_triggers=ON")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO sessions(id, name, created_at, updated_at) VALUES (?, ?, 0, 0)",
+        [("s1", "s1"), ("s2", "s2")],
+    )
+    return conn
+
+
+def _flow(flow_id: str, status: int) -> dict:
+    return {
+        "id": flow_id,
+        "msg_ts": 1.0,
+        "request": {"method": "GET", "url": "https://example.com/"},
+        "response": {"status": status},
+    }
+
+
+class TestFlowDbFlowRepo(unittest.TestCase):
+    def test_store_flow_group_commits_mixed_sessions_once(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        db = _FakeDb(conn)
+
+        stored = flow_repo.store_flow_group(
+            db,
+            [(_flow("f1", 100), "s1"), (_flow("f2", 200), "s2"), (_flow("f1", 204), "s1")],
+        )
+
+        self.assertEqual(stored, 3)
+        rows = {r["id"]: r for r in conn.execute("SELECT id, session_id, status FROM flow_indices")}
+        self.assertEqual(set(rows), {"f1", "f2"})
+        self.assertEqual(rows["f1"]["status"], 204)  # later snapshot wins
+        self.assertEqual(rows["f2"]["session_id"], "s2")
+        detail = json.loads(
+            conn.execute("SELECT data FROM flow_details WHERE id = 'f1'").fetchone()["data"]
+        )
+        self.assertEqual(detail["response"]["status"], 204)
+        counts = dict(conn.execute("SELECT id, flow_count FROM sessions").fetchall())
+        self.assertEqual(counts, {"s1": 1, "s2": 1})
+        self.assertGreater(db._last_write_ts, 0)
+
+    def test_store_flow_group_falls_back_to_single_stores_when_commit_fails(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        db = _FakeDb(conn)
+        real_insert = flow_repo.insert_flow_rows
+        calls = {"n": 0}
+
+        def flaky_insert(*args, **kwargs):
+            calls["n"] += 1
+            if calls["n"] == 2:
+                raise sqlite3.OperationalError("disk I/O error")
+            return real_insert(*args, **kwargs)
+
+        with patch("core.flowdb.flow_repo.insert_flow_rows", side_effect=flaky_insert):
+            stored = flow_repo.store_flow_group(db, [(_flow("f1", 200), "s1"), (_flow("f2", 200), "s1")])
+
+        self.assertEqual(stored, 2)
+        ids = {r["id"] for r in conn.execute("SELECT id FROM flow_indices")}
+        self.assertEqual(ids, {"f1", "f2"})
+
+    def test_get_poll_indices_returns_wire_shaped_rows(self):
+        conn = _create_conn()
+        self.addCleanup(conn.close)
+        db = _FakeDb(conn)
+        flow_repo.store_flow_group(db, [(_flow("f1", 200), "s1"), (_flow("f2", 500), "s2")])
+        conn.execute("UPDATE flow_indices SET hits = '[{\"id\": \"r1\"}]', is_sse = 1 WHERE id = 'f1'")
+
+        rows = flow_repo.get_poll_indices(db, session_id="s1")
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(list(row), list(flow_repo._POLL_INDEX_KEYS))
+        self.assertEqual((row["id"], row["status"], row["msg_ts"]), ("f1", 200, 1.0))
+        self.assertIs(row["isSse"], True)
+        self.assertIs(row["hasError"], False)
+        self.assertEqual(row["hits"], [{"id": "r1"}])
+        legacy = flow_repo.get_indices(db, session_id="s1")[0]
+        self.assertEqual(legacy["http_version"], row["httpVersion"])
+
+    def test_build_flow_data_clean_serializes_placeholders_and_edge_values(self):
+        from decimal import Decimal
+
+        flow = {
+            "id": "f1",
+            "request": {"postData": {"text": "big"}},
+            "response": {"content": {"text": "ok"}},
+            "meta": {1: Decimal("1.5")},
+        }
+        data = json.loads(flow_repo.build_flow_data_clean(flow, "compressed", "inline"))
+        self.assertEqual(data["request"]["postData"]["text"], flow_repo.get_placeholder("compressed"))
+        self.assertEqual(data["response"]["content"]["text"], "ok")
+        self.assertEqual(data["meta"], {"1": 1.5})
+        self.assertEqual(flow["request"]["postData"]["text"], "big")
+
+        # orjson rejects lone surrogates and >64-bit ints; json takes over
+        odd = {"id": "f2", "text": "\ud800", "big": 2 ** 70}
+        self.assertEqual(
+            json.loads(flow_repo.build_flow_data_clean(odd, "inline", "inline")),
+            odd,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -54,6 +54,7 @@ def _make_monitor():
     monitor.db = MagicMock()
     monitor.logger = MagicMock()
     monitor.debug_mgr = MagicMock()
+    monitor.flush_stores = MagicMock()
     return monitor
 
 
@@ -62,13 +63,13 @@ class TestHttpHandlersSmoke(unittest.TestCase):
         monitor = _make_monitor()
         monitor.db.drain_notifications.return_value = []
 
-        with patch("core.http_handlers.realtime.get_indices", return_value=[{"id": "f1", "msg_ts": 123}]):
+        with patch("core.http_handlers.realtime.get_poll_indices", return_value=[{"id": "f1", "msg_ts": 123}]):
             flow = _make_flow(query={"since": "0"})
             handled = handle_realtime_routes(monitor, flow, "relay_poll", _FakeResponse, _safe_json_default)
             self.assertTrue(handled)
             self.assertEqual(flow.response.status_code, 200)
 
-        with patch("core.http_handlers.realtime.get_indices", side_effect=RuntimeError("db error")):
+        with patch("core.http_handlers.realtime.get_poll_indices", side_effect=RuntimeError("db error")):
             flow = _make_flow(query={"since": "0"})
             handle_realtime_routes(monitor, flow, "relay_poll", _FakeResponse, _safe_json_default)
             self.assertEqual(flow.response.status_code, 500)
@@ -100,6 +101,18 @@ class TestHttpHandlersSmoke(unittest.TestCase):
         handle_data_routes(monitor, flow, "relay_search", _FakeResponse, _safe_json_default)
         self.assertEqual(flow.response.status_code, 500)
 
+    def test_relay_export_session_ndjson_writes_one_flow_per_line(self):
+        flows = [{"id": "f1"}, {"id": "f2"}]
+        with patch("core.http_handlers.data.iter_all_flows", return_value=iter(flows)):
+            monitor = _make_monitor()
+            flow = _make_flow(query={"session_id": "s1"})
+            handled = handle_data_routes(monitor, flow, "relay_export_session_ndjson", _FakeResponse, _safe_json_default)
+            self.assertTrue(handled)
+            self.assertEqual(flow.response.status_code, 200)
+            self.assertEqual(flow.response.headers["Content-Type"], "application/x-ndjson")
+            lines = flow.response.content.decode("utf-8").splitlines()
+            self.assertEqual([json.loads(line) for line in lines], flows)
+
     def test_relay_session_new_success_and_exception(self):
         monitor = _make_monitor()
         monitor.db.create_new_session_for_app_start.return_value = "s_new"
@@ -169,6 +182,20 @@ class TestHttpHandlersSmoke(unittest.TestCase):
             flow = _make_flow(content=payload, method="POST")
             handle_import_routes(monitor, flow, "relay_import_session", _FakeResponse)
             self.assertEqual(flow.response.status_code, 500)
+            self.assertNotIn(b"import error", flow.response.content)
+
+    def test_relay_import_session_minimal_skips_list_indices(self):
+        with patch("core.http_handlers.importers.create_session", return_value="s_imported"):
+            monitor = _make_monitor()
+            monitor._build_session_indices = MagicMock()
+            payload = json.dumps([{"id": "f1", "msg_ts": 1.0}]).encode("utf-8")
+            flow = _make_flow(query={"minimal": "1"}, content=payload, method="POST")
+            handle_import_routes(monitor, flow, "relay_import_session", _FakeResponse)
+
+        self.assertEqual(flow.response.status_code, 200)
+        monitor._build_session_indices.assert_not_called()
+        body = json.loads(flow.response.content)
+        self.assertEqual(body["indices"], [{"id": "f1", "msg_ts": 1.0}])
 
     def test_cert_serve_success_and_exception(self):
         monitor = _make_monitor()
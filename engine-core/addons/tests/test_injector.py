@@ -2,10 +2,12 @@ import unittest
 import sys
 import os
 import ast
+from unittest.mock import patch
 
 # Add parent to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import injector
 from injector import inject_tracking
 
 class TestInjector(unittest.TestCase):
@@ -67,5 +69,21 @@ def request(flow):
         self.assertIn("[SCRIPT] ", modified)
         self.assertIn("Original Message", modified)
 
+    def test_same_source_is_transformed_once(self):
+        source = """
+def request(flow):
+    if flow.request.host == "cache.example.com":
+        pass
+"""
+        first = inject_tracking(source)
+        with patch("injector.ast.parse", side_effect=AssertionError("re-parsed")):
+            second = inject_tracking(source, script_path="other.py")
+        self.assertEqual(first, second)
+
+    def test_transform_cache_is_bounded(self):
+        for i in range(injector._TRANSFORM_CACHE_MAX + 5):
+            inject_tracking(f"def request(flow):\n    x = {i}\n")
+        self.assertLessEqual(len(injector._transform_cache), injector._TRANSFORM_CACHE_MAX)
+
 if __name__ == "__main__":
     unittest.main()
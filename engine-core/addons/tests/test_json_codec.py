@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+from core import json_codec
+
+
+class TestJsonCodec(unittest.TestCase):
+    def test_dump_json_matches_stdlib_output(self):
+        cases = [
+            {"a": "é", "b": [1, 2.5, None, True]},
+            {1: "int key"},
+            {"big": 2 ** 70},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                encoded = json_codec.dump_json(data)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(json.loads(encoded.decode("utf-8")), json.loads(json.dumps(data)))
+
+    def test_dump_json_uses_default_for_unknown_types(self):
+        self.assertEqual(json_codec.dump_json({"s": {1}}, default=sorted), b'{"s":[1]}')
+
+    def test_dump_json_array_and_lines(self):
+        items = [{"id": 1}, {"id": 2}]
+        self.assertEqual(
+            json_codec.dump_json_array(items, prefix=b'{"items":', suffix=b"}"),
+            b'{"items":[{"id":1},{"id":2}]}',
+        )
+        self.assertEqual(json_codec.dump_json_lines(items), b'{"id":1}\n{"id":2}\n')
+
+    def test_load_json_falls_back_to_stdlib(self):
+        self.assertEqual(json_codec.load_json(b'{"a": [1, "\xc3\xa9"]}'), {"a": [1, "é"]})
+        self.assertEqual(json_codec.load_json(b'{"big": 1180591620717411303424}'), {"big": 2 ** 70})
+        with self.assertRaises(json.JSONDecodeError):
+            json_codec.load_json(b"{not json")
+
+
+    def test_dump_json_str_carries_lone_surrogates(self):
+        data = {"text": "\ud800", "big": 2 ** 70}
+        self.assertEqual(json.loads(json_codec.dump_json_str(data)), data)
+
+    def test_stdlib_fallback_without_orjson(self):
+        with patch.object(json_codec, "orjson", None):
+            self.assertEqual(json_codec.dump_json({1: "é"}), '{"1": "é"}'.encode("utf-8"))
+            self.assertEqual(json_codec.dump_json_str({"a": [1]}), '{"a": [1]}')
+            self.assertEqual(json_codec.load_json(b'{"a": 1}'), {"a": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import base64
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+# Mock mitmproxy modules before importing monitor
+import tests.mock_mitmproxy  # noqa: F401
+
+from core.monitor import TrafficMonitor
+
+
+def _message(content: bytes, content_type: str = None):
+    headers = {"content-type": content_type} if content_type is not None else {}
+    return SimpleNamespace(content=content, headers=headers)
+
+
+class TestMonitorDecodeContent(unittest.TestCase):
+    def test_decode_content_table_driven(self):
+        monitor = object.__new__(TrafficMonitor)
+        png = b"\x89PNG\r\n\x1a\n"
+        cases = [
+            (b"", "text/plain", ("", "text")),
+            (b"hello", "text/plain; charset=utf-8", ("hello", "text")),
+            (b"hello", "Image/PNG", (base64.b64encode(b"hello").decode(), "base64")),
+            (b"{}", "application/pdf; x=1", (base64.b64encode(b"{}").decode(), "base64")),
+            (png, None, (base64.b64encode(png).decode(), "base64")),
+            (b"GIF89a", "text/plain", (base64.b64encode(b"GIF89a").decode(), "base64")),
+            (b"\x00a", None, (base64.b64encode(b"\x00a").decode(), "base64")),
+            (b"\xc3\x28", None, (base64.b64encode(b"\xc3\x28").decode(), "base64")),
+            ("héllo".encode(), "text/html", ("héllo", "text")),
+        ]
+        for content, content_type, expected in cases:
+            with self.subTest(content=content, content_type=content_type):
+                body, encoding, truncated = monitor.decode_content(_message(content, content_type))
+                self.assertEqual((body, encoding), expected)
+                self.assertFalse(truncated)
+
+    def test_decode_content_uses_values_passed_by_caller(self):
+        monitor = object.__new__(TrafficMonitor)
+        message = _message(b"ignored", "text/plain")
+
+        body, encoding, _ = monitor.decode_content(message, b"hi", "image/png")
+        self.assertEqual((body, encoding), (base64.b64encode(b"hi").decode(), "base64"))
+
+        body, encoding, _ = monitor.decode_content(message, b"hi", None)
+        self.assertEqual((body, encoding), ("hi", "text"))
+
+
+if __name__ == "__main__":
+    unittest.main()
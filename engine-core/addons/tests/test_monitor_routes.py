@@ -35,9 +35,13 @@ class TestMonitorRouteResolution(unittest.TestCase):
             ("GET", "/_relay/scripts/load_status", "127.0.0.1", "relay_scripts_load_status"),
             ("GET", "/_relay/export_session?session_id=s1", "127.0.0.1", "relay_export_session"),
             ("GET", "/_relay/export_har?session_id=s1", "127.0.0.1", "relay_export_har"),
+            ("GET", "/_relay/export_session_ndjson?session_id=s1", "127.0.0.1", "relay_export_session_ndjson"),
             ("GET", "/cert", "127.0.0.1", "cert_serve"),
             ("GET", "/", "relay.guide", "cert_serve"),
             ("OPTIONS", "/_relay/anything", "127.0.0.1", "relay_options"),
+            ("GET", "/_relay/poll/", "127.0.0.1", "relay_poll"),
+            ("GET", "/_relay/unknown?next=/_relay/poll", "127.0.0.1", ""),
+            ("GET", "/api?next=/_relay/poll", "example.com", ""),
             ("GET", "/unmatched", "127.0.0.1", ""),
         ]
 
@@ -0,0 +1,69 @@
+import os
+import queue
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent addon directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+addons_dir = os.path.dirname(current_dir)
+sys.path.append(addons_dir)
+
+# Mock mitmproxy modules before importing monitor
+import tests.mock_mitmproxy  # noqa: F401
+
+from core import monitor as monitor_module
+from core.monitor import TrafficMonitor
+
+
+def _monitor_with_stopped_writer() -> TrafficMonitor:
+    monitor = object.__new__(TrafficMonitor)
+    monitor.db = object()
+    monitor.logger = MagicMock()
+    monitor._store_queue = queue.Queue()
+    monitor._store_thread = threading.Thread(target=lambda: None)
+    return monitor
+
+
+class TestMonitorFlushStores(unittest.TestCase):
+    def test_flush_drains_inline_when_writer_is_stopped(self):
+        monitor = _monitor_with_stopped_writer()
+        monitor._store_queue.put(({"id": "f1"}, "s1"))
+        with patch.object(monitor_module, "_store_flow_group") as store:
+            self.assertTrue(monitor.flush_stores(timeout=0.1))
+        store.assert_called_once_with(monitor.db, [({"id": "f1"}, "s1")])
+        self.assertEqual(monitor._store_queue.unfinished_tasks, 0)
+
+    def test_flush_times_out_on_stalled_writer(self):
+        monitor = _monitor_with_stopped_writer()
+        release = threading.Event()
+        monitor._store_thread = threading.Thread(target=release.wait, daemon=True)
+        monitor._store_thread.start()
+        self.addCleanup(release.set)
+        monitor._store_queue.put(({"id": "f1"}, "s1"))
+        self.assertFalse(monitor.flush_stores(timeout=0.05))
+        monitor.logger.warning.assert_called_once()
+
+
+class TestMonitorStoreQueue(unittest.TestCase):
+    def test_full_queue_without_writer_stores_in_order(self):
+        monitor = _monitor_with_stopped_writer()
+        monitor._STORE_PUT_TIMEOUT = 0.01
+        monitor._store_queue = queue.Queue(maxsize=1)
+        monitor.db = MagicMock()
+        monitor.db._get_session_id.return_value = "s1"
+        monitor._store_queue.put(({"id": "old"}, "s1"))
+
+        with patch.object(monitor_module, "_store_flow_group") as store:
+            monitor._store_flow({"id": "new"})
+
+        self.assertEqual(
+            [c.args[1] for c in store.call_args_list],
+            [[({"id": "old"}, "s1")], [({"id": "new"}, "s1")]],
+        )
+        self.assertEqual(monitor._store_queue.unfinished_tasks, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import asyncio
 import base64
+import copy
 import os
 import sys
 import threading
@@ -30,6 +32,8 @@ def make_monitor() -> TrafficMonitor:
     monitor._ws_flows_lock = threading.Lock()
     monitor._ws_flows = {}
     monitor._ws_inject_max_payload_bytes = 1024 * 1024
+    monitor._ws_frame_cache = {}
+    monitor._ws_capture_timers = {}
     return monitor
 
 
@@ -212,9 +216,119 @@ class TestWsInject(unittest.TestCase):
         with monitor._ws_flows_lock:
             self.assertIn("f_rt", monitor._ws_flows)
 
+        monitor._ws_frame_cache["f_rt"] = (0, [])
         ws_handler.unregister_ws_flow(monitor, flow)
         with monitor._ws_flows_lock:
             self.assertNotIn("f_rt", monitor._ws_flows)
+        self.assertNotIn("f_rt", monitor._ws_frame_cache)
+
+
+class TestWsMessageCapture(unittest.TestCase):
+    def test_message_burst_is_captured_once(self):
+        monitor = make_monitor()
+        monitor.process_flow = MagicMock(return_value={"id": "f_burst"})
+        monitor._store_flow = MagicMock()
+        flow = _FakeFlow(flow_id="f_burst", ws=_FakeWebSocket())
+
+        async def burst():
+            for _ in range(5):
+                monitor.handle_websocket_message(flow)
+            monitor.process_flow.assert_not_called()
+            await asyncio.sleep(0.15)
+
+        asyncio.run(burst())
+
+        monitor.process_flow.assert_called_once_with(flow)
+        monitor._store_flow.assert_called_once_with({"id": "f_burst"})
+        self.assertNotIn(flow.id, monitor._ws_capture_timers)
+        self.assertIn("_relaycraft_msg_ts", flow.metadata)
+
+    def test_cancelled_capture_does_not_run(self):
+        monitor = make_monitor()
+        monitor.process_flow = MagicMock(return_value={"id": "f_end"})
+        monitor._store_flow = MagicMock()
+        flow = _FakeFlow(flow_id="f_end", ws=_FakeWebSocket())
+
+        async def message_then_end():
+            monitor.handle_websocket_message(flow)
+            # mitmproxy's get_state() deep-copies metadata while a capture is pending
+            copy.deepcopy(flow.metadata)
+            monitor.cancel_ws_capture(flow)
+            await asyncio.sleep(0.15)
+
+        asyncio.run(message_then_end())
+
+        monitor.process_flow.assert_not_called()
+        self.assertNotIn(flow.id, monitor._ws_capture_timers)
+
+    def test_message_without_event_loop_is_captured_immediately(self):
+        monitor = make_monitor()
+        monitor.process_flow = MagicMock(return_value={"id": "f_sync"})
+        monitor._store_flow = MagicMock()
+        flow = _FakeFlow(flow_id="f_sync", ws=_FakeWebSocket())
+
+        monitor.handle_websocket_message(flow)
+
+        monitor._store_flow.assert_called_once_with({"id": "f_sync"})
+
+
+class _CountingMessage:
+    decoded = 0
+
+    def __init__(self, text: str):
+        self._text = text
+        self.type = "text"
+        self.from_client = True
+        self.is_text = True
+        self.timestamp = 1.0
+
+    @property
+    def content(self):
+        return self._text.encode()
+
+    @property
+    def text(self):
+        _CountingMessage.decoded += 1
+        return self._text
+
+
+class TestWsFrameCache(unittest.TestCase):
+    def test_snapshots_encode_only_new_frames(self):
+        monitor = make_monitor()
+        ws = _FakeWebSocket()
+        flow = _FakeFlow(flow_id="f_cache", ws=ws)
+        ws_handler.register_ws_flow(monitor, flow)
+        ws.messages.extend(_CountingMessage(f"m{i}") for i in range(3))
+        _CountingMessage.decoded = 0
+
+        first = monitor._build_ws_data(flow, True)
+        ws.messages.append(_CountingMessage("m3"))
+        second = monitor._build_ws_data(flow, True)
+
+        self.assertEqual(_CountingMessage.decoded, 4)
+        self.assertEqual([f["content"] for f in first["frames"]], ["m0", "m1", "m2"])
+        self.assertEqual([f["content"] for f in second["frames"]], ["m0", "m1", "m2", "m3"])
+        self.assertEqual(second["frames"][3]["id"], "f_cache-3")
+        self.assertEqual(second["frames"][3]["seq"], 3)
+
+    def test_window_slides_and_closed_flow_drops_cache(self):
+        monitor = make_monitor()
+        ws = _FakeWebSocket()
+        flow = _FakeFlow(flow_id="f_slide", ws=ws)
+        ws_handler.register_ws_flow(monitor, flow)
+        ws.messages.extend(_CountingMessage(f"m{i}") for i in range(500))
+        monitor._build_ws_data(flow, True)
+
+        ws.messages.extend(_CountingMessage(f"m{i}") for i in range(500, 502))
+        data = monitor._build_ws_data(flow, True)
+
+        self.assertEqual(len(data["frames"]), 500)
+        self.assertEqual((data["frames"][0]["id"], data["frames"][0]["seq"]), ("f_slide-2", 0))
+        self.assertEqual(data["frames"][-1]["content"], "m501")
+
+        ws.closed_at_server = True
+        self.assertFalse(monitor._build_ws_data(flow, True)["open"])
+        self.assertNotIn("f_slide", monitor._ws_frame_cache)
 
 
 if __name__ == "__main__":
@@ -78,6 +78,8 @@ def build(sync_only=False):
         '--hidden-import=sqlite3',
         '--hidden-import=pysqlite3',
         '--hidden-import=ijson',
+        '--hidden-import=orjson',
+        '--hidden-import=pybase64',
         '--collect-all=mitmproxy',
         '--collect-all=jsonpath_ng',
         '--clean',